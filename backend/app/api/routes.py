@@ -1,20 +1,64 @@
 """API routes for KGCFP graph operations."""
+import json
+import os
+import time
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-
-from app.graph.connection import get_session
-from app.graph.queries import GraphQueries
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from neo4j import AsyncSession
+from pydantic import BaseModel, Field
+
+from app.graph.cache import (
+    bump_graph_version,
+    etag_headers,
+    etag_matches,
+    get_cached_stats,
+    get_graph_version,
+    graph_etag,
+    graph_snapshots,
+    query_snapshots,
+    set_cached_stats,
+    SnapshotCache,
+)
+from app.graph.connection import get_db_session, session_scope
+from app.graph.layout import update_layout
+from app.graph.lineage import update_lineage
+from app.graph.profiling import clear_profiles, get_profiles, profile_token_valid, profiling_enabled
+from app.api.wire import encode_columnar, negotiate_columnar, to_columnar
+from app.graph.queries import (
+    GraphQueries,
+    cluster_filters,
+    decode_cursor,
+    encode_cursor,
+    facet_filters,
+    TIMELINE_LABELS,
+)
 
 
 router = APIRouter()
 
+# Default number of rows written per UNWIND transaction by /import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+# Most node ids accepted by /nodes:batch
+MAX_BATCH_NODES = 500
+
+# Bounds on a single /paths search, so one request cannot hold the pool
+PATH_TIME_BUDGET = float(os.getenv("PATH_TIME_BUDGET", "2.0"))
+PATH_MAX_EXPANSIONS = int(os.getenv("PATH_MAX_EXPANSIONS", "2000"))
+
 
 # Request/Response Models
 class ImportRequest(BaseModel):
     """Request model for importing data."""
     data: dict
+    batch_size: Optional[int] = Field(None, ge=1, le=50000)
+
+
+class NodeBatchRequest(BaseModel):
+    """Request model for fetching several nodes at once."""
+    ids: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_NODES)
 
 
 class GraphNode(BaseModel):
@@ -24,6 +68,8 @@ class GraphNode(BaseModel):
     name: str
     dynasty: Optional[str] = None
     role: Optional[str] = None
+    x: Optional[float] = None
+    y: Optional[float] = None
 
 
 class GraphEdge(BaseModel):
@@ -37,6 +83,81 @@ class GraphData(BaseModel):
     """Complete graph data model."""
     nodes: list[GraphNode]
     edges: list[GraphEdge]
+    next_cursor: Optional[str] = None
+    facets: Optional[dict[str, dict[str, int]]] = None
+
+
+class ClusterNode(BaseModel):
+    """Super-node standing for a group of nodes in the overview."""
+    id: str
+    name: str
+    size: int
+    labels: dict[str, int]
+    merged: list[str] = []
+
+
+class ClusterEdge(BaseModel):
+    """Aggregated edge between two overview clusters."""
+    source: str
+    target: str
+    weight: int
+    types: dict[str, int]
+
+
+class GraphOverview(BaseModel):
+    """Clustered level-of-detail view of the graph."""
+    nodes: list[ClusterNode]
+    edges: list[ClusterEdge]
+
+
+class Neighborhood(BaseModel):
+    """Bounded subgraph around a single node."""
+    center: str
+    nodes: list[GraphNode]
+    edges: list[GraphEdge]
+    truncated: bool
+
+
+class LineageNode(GraphNode):
+    """Node in a teaching lineage, `depth` generations from its center."""
+    depth: int
+
+
+class Lineage(BaseModel):
+    """Students or masters of a node with the teaching edges between them."""
+    center: GraphNode
+    direction: str
+    nodes: list[LineageNode]
+    edges: list[GraphEdge]
+
+
+class TimelineNode(GraphNode):
+    """Node with the year range it was active in."""
+    start_year: Optional[int] = None
+    end_year: Optional[int] = None
+
+
+class Timeline(BaseModel):
+    """Nodes active during a year interval, earliest first."""
+    nodes: list[TimelineNode]
+    truncated: bool
+
+
+class GraphPath(BaseModel):
+    """A single path as node ids and the edges between them."""
+    nodes: list[str]
+    edges: list[GraphEdge]
+    length: int
+
+
+class PathResult(BaseModel):
+    """Shortest paths between two nodes."""
+    source: str
+    target: str
+    paths: list[GraphPath]
+    nodes: list[GraphNode]
+    expanded: int
+    truncated: bool
 
 
 class SearchResult(BaseModel):
@@ -44,86 +165,352 @@ class SearchResult(BaseModel):
     id: str
     label: str
     name: str
+    score: float
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def graph_facets(
+    period_ref: Optional[list[str]] = Query(None),
+    primary_role: Optional[list[str]] = Query(None),
+    status: Optional[list[str]] = Query(None),
+    support: Optional[list[str]] = Query(None),
+    source_book: Optional[list[str]] = Query(None),
+) -> dict[str, list[str]]:
+    """Facet query parameters shared by /graph and /search."""
+    facets = {
+        "period_ref": period_ref,
+        "primary_role": primary_role,
+        "status": status,
+        "support": support,
+        "source_book": source_book,
+    }
+    return {facet: values for facet, values in facets.items() if values}
+
+
+async def check_not_modified(request: Request) -> None:
+    """
+    Answer reads of an unchanged graph with 304 before any query runs.
+
+    The ETag comes from the graph version, read before the handler so a
+    concurrent import can only make it older than the data. It is stored on
+    ``request.state`` for the middleware that adds it to the response.
+    """
+    if (
+        request.method not in ("GET", "HEAD")
+        or "/admin/" in request.url.path
+        or "x-profile-queries" in request.headers
+    ):
+        return
+    etag = graph_etag(get_graph_version(), request.headers.get("accept", ""))
+    request.state.etag = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=etag_headers(etag))
+
+
+async def _cached_response(
+    cache: SnapshotCache, cache_key: tuple, build, media_type: str = "application/json"
+) -> Response:
+    """
+    Serve a payload cached for the current graph version.
+
+    On a miss ``build`` is awaited for the serialized payload and whether it
+    may be cached. Errors other than HTTPException are reported as 500s.
+    The cache is bypassed while queries are being profiled.
+    """
+    profiled = profiling_enabled()
+    version = get_graph_version()
+    payload = None if profiled else cache.get(version, cache_key)
+    if payload is None:
+        try:
+            payload, cacheable = await build()
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        if cacheable and not profiled:
+            cache.put(version, cache_key, payload)
+
+    return Response(content=payload, media_type=media_type)
+
+
+async def require_profile_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Dependency restricting the profile endpoints to holders of PROFILE_TOKEN."""
+    if not profile_token_valid(x_profile_token):
+        raise HTTPException(status_code=403, detail="A valid X-Profile-Token header is required")
+
+
+async def _stream_graph_ndjson():
+    """Yield the whole graph as NDJSON: one line per node, then per edge."""
+    # The request-scoped session is not usable once the response starts
+    # streaming, so the generator owns its session.
+    async with session_scope() as session:
+        queries = GraphQueries(session)
+        async for node in queries.iter_graph_nodes():
+            yield json.dumps({"node": node}, ensure_ascii=False) + "\n"
+        async for edge in queries.iter_graph_edges():
+            yield json.dumps({"edge": edge}, ensure_ascii=False) + "\n"
+
+
+async def _get_columnar_graph(session: AsyncSession, media_type: str) -> Response:
+    """Build (or serve from cache) the whole graph in a columnar encoding."""
+    cache_key = ("columnar", media_type)
+
+    async def build():
+        queries = GraphQueries(session)
+
+        graph_data = await queries.get_graph_data()
+
+        document = to_columnar(graph_data["nodes"], graph_data["edges"])
+        payload = encode_columnar(document, media_type)
+
+        return payload, True
+
+    return await _cached_response(graph_snapshots, cache_key, build, media_type)
+
+
+async def _refresh_layout(full: bool = False) -> None:
+    """Background task placing nodes that have no stored layout position."""
+    try:
+        async with session_scope() as session:
+            if await update_layout(session, full=full):
+                bump_graph_version()
+    except Exception as e:
+        print(f"Warning: Layout update failed: {e}")
+
+
+async def _refresh_lineage() -> None:
+    """Background task rebuilding the precomputed teaching lineages."""
+    try:
+        async with session_scope() as session:
+            await update_lineage(session)
+        bump_graph_version()
+    except Exception as e:
+        print(f"Warning: Lineage update failed: {e}")
+
+
+def _serialize_graph_page(graph_data: dict) -> bytes:
+    """Serialize a get_graph_page result as a GraphData JSON document."""
+    nodes = [
+        GraphNode(
+            id=n["id"],
+            label=n["label"],
+            name=n["name"],
+            dynasty=n.get("dynasty"),
+            role=n.get("role"),
+            x=n.get("x"),
+            y=n.get("y"),
+        )
+        for n in graph_data["nodes"]
+    ]
+
+    edges = [
+        GraphEdge(source=e["source"], target=e["target"], type=e["type"])
+        for e in graph_data["edges"]
+    ]
+
+    next_cursor = graph_data["next_cursor"]
+    return GraphData(
+        nodes=nodes,
+        edges=edges,
+        next_cursor=encode_cursor(*next_cursor) if next_cursor else None,
+        facets=graph_data.get("facets"),
+    ).model_dump_json().encode("utf-8")
 
 
 # Routes
 @router.get("/graph", response_model=GraphData)
-async def get_graph(limit: int = Query(100, ge=1, le=500)):
+async def get_graph(
+    request: Request,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    label: Optional[list[str]] = Query(None),
+    rel_types: Optional[list[str]] = Query(None, alias="type"),
+    facets: dict[str, list[str]] = Depends(graph_facets),
+    session: AsyncSession = Depends(get_db_session),
+):
     """
-    Get the complete knowledge graph data.
+    Get a page of the knowledge graph data.
+
+    Returns up to `limit` nodes with their outgoing edges for visualization.
+    Pass the returned `next_cursor` back as `cursor` to fetch the next page;
+    it is null once the last page has been returned.
+
+    With `stream=1` or `Accept: application/x-ndjson` the whole graph is
+    streamed instead, straight from the database cursor, as
+    `{"node": ...}` lines followed by `{"edge": ...}` lines.
 
-    Returns nodes and edges for visualization.
+    With `Accept: application/x-msgpack` or
+    `Accept: application/vnd.kgcfp.columnar+json` the whole graph is
+    returned in a compact columnar form: a string dictionary, node columns
+    of string indices and edges as parallel integer arrays.
+
+    Paged responses can be narrowed by `label`, relationship `type`,
+    `period_ref`, `primary_role`, Work `status`/`support` and `source_book`;
+    the first page of a filtered walk also carries `facets`, the number of
+    matching nodes (and outgoing edges) per facet value.
     """
+    accept = request.headers.get("accept", "")
+    filtered = bool(label or rel_types or facets)
+    if filtered and (stream or NDJSON_MEDIA_TYPE in accept or negotiate_columnar(accept)):
+        raise HTTPException(status_code=400, detail="Filters are only supported for paged JSON responses")
+
+    if stream or NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(_stream_graph_ndjson(), media_type=NDJSON_MEDIA_TYPE)
+
+    columnar_media_type = negotiate_columnar(accept)
+    if columnar_media_type:
+        return await _get_columnar_graph(session, columnar_media_type)
+
     try:
-        session = await get_session()
+        page_key = decode_cursor(cursor, 2) if cursor else None
+        filters, params = facet_filters(facets, label) if filtered else (None, {})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Serve repeat loads of an unchanged graph without touching Neo4j
+    cache_key = (
+        "page", limit, cursor,
+        tuple(label or ()), tuple(rel_types or ()), tuple(sorted((k, tuple(v)) for k, v in facets.items())),
+    )
+
+    async def build():
         queries = GraphQueries(session)
 
-        graph_data = await queries.get_graph_data()
+        graph_data = await queries.get_graph_page(limit, page_key, filters, params, rel_types)
+        if filtered and cursor is None:
+            graph_data["facets"] = await queries.get_facet_counts(filters, params, rel_types)
 
-        # Convert to response model
-        nodes = [
-            GraphNode(
-                id=n["id"],
-                label=n["label"],
-                name=n["name"],
-                dynasty=n.get("dynasty"),
-                role=n.get("role"),
-            )
-            for n in graph_data["nodes"]
-        ]
+        payload = _serialize_graph_page(graph_data)
 
-        edges = [
-            GraphEdge(source=e["source"], target=e["target"], type=e["type"])
-            for e in graph_data["edges"]
-        ]
+        return payload, True
 
-        await session.close()
+    return await _cached_response(graph_snapshots, cache_key, build)
 
-        return GraphData(nodes=nodes, edges=edges)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/graph/overview", response_model=GraphOverview)
+async def get_graph_overview(
+    max_clusters: int = Query(200, ge=2, le=500),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get a clustered overview of the knowledge graph.
 
+    Nodes are collapsed into at most `max_clusters` super-nodes, one per
+    period (or per label for nodes without a period), with edge counts
+    aggregated between them. Use /graph/clusters/{cluster_id} to drill in.
+    """
+    cache_key = ("overview", max_clusters)
 
-@router.get("/search")
-async def search(q: str = Query(..., min_length=1)):
+    async def build():
+        queries = GraphQueries(session)
+
+        overview = await queries.get_overview(max_clusters)
+
+        payload = GraphOverview(**overview).model_dump_json().encode("utf-8")
+
+        return payload, True
+
+    return await _cached_response(graph_snapshots, cache_key, build)
+
+
+@router.get("/graph/clusters/{cluster_id}", response_model=GraphData)
+async def get_graph_cluster(
+    cluster_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    session: AsyncSession = Depends(get_db_session),
+):
     """
-    Search for nodes by name.
+    Get a page of the member nodes of an overview cluster.
 
-    Returns matching nodes.
+    Paginates like /graph. The "other" cluster has no members of its own;
+    drill into the clusters listed in its `merged` field instead.
     """
     try:
-        session = await get_session()
+        filters, params = cluster_filters(cluster_id)
+        page_key = decode_cursor(cursor, 2) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    cache_key = ("cluster", cluster_id, limit, cursor)
+
+    async def build():
         queries = GraphQueries(session)
 
-        results = await queries.search_nodes(q)
+        graph_data = await queries.get_graph_page(limit, page_key, filters, params)
+
+        payload = _serialize_graph_page(graph_data)
+
+        return payload, True
+
+    return await _cached_response(graph_snapshots, cache_key, build)
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1),
+    label: Optional[list[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    facets: dict[str, list[str]] = Depends(graph_facets),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Search for nodes by name, title, courtesy name, pseudonym, other names
+    or historical place names; locations and literature also match their id.
+
+    Returns matching nodes ranked by relevance, optionally restricted to
+    the given labels and facet values, with the number of matches per
+    facet value.
+    """
+    try:
+        filters, params = facet_filters(facets, label) if label or facets else (None, {})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        queries = GraphQueries(session)
 
-        await session.close()
+        results = await queries.search_nodes(q, filters, params, limit)
+        facet_counts = await queries.search_facets(q, filters, params)
 
-        return {"results": results}
+        return {"results": [SearchResult(**r) for r in results], "facets": facet_counts}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/nodes/{node_id}")
-async def get_node(node_id: str):
+async def get_node(
+    node_id: str,
+    types: Optional[list[str]] = Query(None, alias="type"),
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_db_session),
+):
     """
     Get detailed information about a specific node.
+
+    Includes per-type relationship degrees and the first `limit`
+    relationships in both directions; follow `next_cursor` through
+    /nodes/{node_id}/relationships for the rest.
     """
     try:
-        session = await get_session()
         queries = GraphQueries(session)
 
-        details = await queries.get_node_details(node_id)
-        relationships = await queries.get_node_relationships(node_id)
-
-        await session.close()
-
-        if not details:
+        summary = await queries.get_node_summary(node_id)
+        if not summary:
             raise HTTPException(status_code=404, detail="Node not found")
 
-        return {"node": details, "relationships": relationships}
+        page = await queries.get_node_relationships(node_id, types=types, limit=limit)
+
+        return {
+            "node": summary["node"],
+            "degrees": summary["degrees"],
+            "relationships": page["relationships"],
+            "next_cursor": page["next_cursor"],
+        }
 
     except HTTPException:
         raise
@@ -131,56 +518,330 @@ async def get_node(node_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/nodes/{node_id}/profile")
+async def get_node_profile(
+    node_id: str,
+    works: int = Query(10, ge=0, le=100),
+    literature: int = Query(10, ge=0, le=100),
+    per_type: int = Query(10, ge=0, le=100),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get a node detail page in one query.
+
+    Returns the node, its resolved period, relationships grouped by type
+    with counts, its top `works` works and the top `literature` quotes about
+    it ordered by quality rank.
+    """
+    cache_key = ("profile", node_id, works, literature, per_type)
+
+    async def build():
+        queries = GraphQueries(session)
+
+        profile = await queries.get_node_profile(node_id, works, literature, per_type)
+
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Node not found")
+
+        payload = json.dumps(profile, ensure_ascii=False, default=str).encode("utf-8")
+
+        return payload, True
+
+    return await _cached_response(query_snapshots, cache_key, build)
+
+
+@router.get("/nodes/{node_id}/relationships")
+async def get_node_relationships(
+    node_id: str,
+    direction: str = Query("both", pattern="^(in|out|both)$"),
+    types: Optional[list[str]] = Query(None, alias="type"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get one page of a node's relationships, optionally filtered by type.
+
+    Relationships are ordered by type; pass the returned `next_cursor` to
+    get the following page.
+    """
+    try:
+        queries = GraphQueries(session)
+        return await queries.get_node_relationships(
+            node_id, direction=direction, types=types, limit=limit, cursor=cursor
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/nodes:batch")
+async def get_nodes_batch(request: NodeBatchRequest, session: AsyncSession = Depends(get_db_session)):
+    """
+    Get details and relationships for several nodes in one round trip.
+
+    Returns a map keyed by node id with the first page of each node's
+    relationships; ids that do not exist are listed under `missing` instead.
+    """
+    try:
+        queries = GraphQueries(session)
+
+        node_ids = list(dict.fromkeys(request.ids))
+        details = await queries.get_nodes_details(node_ids)
+        relationships = await queries.get_nodes_relationships(node_ids)
+
+        return {
+            "nodes": {
+                node_id: {"node": details[node_id], **relationships[node_id]}
+                for node_id in node_ids
+                if node_id in details
+            },
+            "missing": [node_id for node_id in node_ids if node_id not in details],
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/nodes/{node_id}/neighborhood", response_model=Neighborhood)
+async def get_neighborhood(
+    node_id: str,
+    hops: int = Query(1, ge=1, le=3),
+    max_nodes: int = Query(100, ge=1, le=500),
+    fanout: int = Query(50, ge=1, le=200),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get the subgraph within `hops` steps of a node.
+
+    Expands breadth-first, following at most `fanout` edges per node and
+    stopping at `max_nodes` nodes, so the UI can explore the graph lazily.
+    """
+    cache_key = ("neighborhood", node_id, hops, max_nodes, fanout)
+
+    async def build():
+        queries = GraphQueries(session)
+
+        neighborhood = await queries.get_neighborhood(node_id, hops, max_nodes, fanout)
+
+        if neighborhood is None:
+            raise HTTPException(status_code=404, detail="Node not found")
+
+        payload = Neighborhood(**neighborhood).model_dump_json().encode("utf-8")
+
+        return payload, True
+
+    return await _cached_response(query_snapshots, cache_key, build)
+
+
+@router.get("/nodes/{node_id}/lineage", response_model=Lineage)
+async def get_lineage(
+    node_id: str,
+    direction: str = Query("descendants", pattern="^(descendants|ancestors)$"),
+    max_depth: int = Query(5, ge=1, le=50),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get the students (`descendants`) or masters (`ancestors`) of a node.
+
+    Answered from the lineage closure built after each import, so deep
+    lineages cost a single indexed lookup.
+    """
+    cache_key = ("lineage", node_id, direction, max_depth)
+
+    async def build():
+        queries = GraphQueries(session)
+
+        lineage = await queries.get_lineage(node_id, direction, max_depth)
+
+        if lineage is None:
+            raise HTTPException(status_code=404, detail="Node not found")
+
+        payload = Lineage(**lineage).model_dump_json().encode("utf-8")
+
+        return payload, True
+
+    return await _cached_response(query_snapshots, cache_key, build)
+
+
+@router.get("/timeline", response_model=Timeline)
+async def get_timeline(
+    start: int = Query(..., alias="from"),
+    end: int = Query(..., alias="to"),
+    label: Optional[list[str]] = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get the persons, periods and works active between two years.
+
+    A node is included when its year range overlaps [`from`, `to`]; years
+    before the common era are negative. Persons are active from birth to
+    death, with a missing year replaced by the bound of their period, and
+    works during their period.
+    """
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    unknown = set(label or ()) - set(TIMELINE_LABELS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown label: {', '.join(sorted(unknown))}")
+
+    cache_key = ("timeline", start, end, tuple(sorted(label or ())), limit)
+
+    async def build():
+        queries = GraphQueries(session)
+
+        # Ask for one extra node to report whether the limit cut the result
+        nodes = await queries.get_timeline(start, end, label, limit + 1)
+
+        payload = Timeline(nodes=nodes[:limit], truncated=len(nodes) > limit).model_dump_json().encode("utf-8")
+
+        return payload, True
+
+    return await _cached_response(query_snapshots, cache_key, build)
+
+
+@router.get("/paths", response_model=PathResult)
+async def find_paths(
+    request: Request,
+    source: str = Query(..., alias="from"),
+    target: str = Query(..., alias="to"),
+    max_hops: int = Query(4, ge=1, le=6),
+    k: int = Query(3, ge=1, le=10),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Find the `k` shortest connections between two nodes.
+
+    Follows social relations and CREATED/WROTE-style edges in either
+    direction, up to `max_hops` steps. The search is bounded by a time
+    budget and an expansion cap; `truncated` reports whether one was hit.
+    """
+    cache_key = ("paths", source, target, max_hops, k)
+
+    async def build():
+        queries = GraphQueries(session)
+
+        result = await queries.find_paths(
+            source,
+            target,
+            max_hops=max_hops,
+            k=k,
+            max_expansions=PATH_MAX_EXPANSIONS,
+            time_budget=PATH_TIME_BUDGET,
+        )
+
+        if result is None:
+            raise HTTPException(status_code=404, detail="Node not found")
+
+        payload = PathResult(**result).model_dump_json().encode("utf-8")
+        # A truncated search depends on timing, so only complete ones are
+        # cached or tagged with the graph version
+        if result["truncated"]:
+            request.state.etag = None
+        return payload, not result["truncated"]
+
+    return await _cached_response(query_snapshots, cache_key, build)
+
+
 @router.post("/import")
-async def import_data(request: ImportRequest):
+async def import_data(
+    request: ImportRequest,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_db_session),
+):
     """
     Import data into the knowledge graph.
 
-    Accepts JSON data with persons, works, and relationships.
+    Accepts JSON data with persons, works, and relationships. Rows are
+    written in batches of `batch_size` (default IMPORT_BATCH_SIZE), one
+    UNWIND query per batch inside an explicit write transaction.
     """
+    batch_size = request.batch_size or IMPORT_BATCH_SIZE
+    started = time.perf_counter()
+
     try:
-        session = await get_session()
         queries = GraphQueries(session)
 
         imported_count = 0
+        imported_count += await queries.merge_persons(request.data.get("persons", []), batch_size)
+        imported_count += await queries.merge_works(request.data.get("works", []), batch_size)
+        imported_count += await queries.merge_relationships(
+            request.data.get("relationships", []), batch_size
+        )
+
+        # Place the new nodes once the response has been sent
+        background_tasks.add_task(_refresh_layout)
+        background_tasks.add_task(_refresh_lineage)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "message": "Import successful",
+            "imported": imported_count,
+            "batch_size": batch_size,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(imported_count / elapsed, 1) if elapsed > 0 else None,
+        }
 
-        # Import persons
-        for person in request.data.get("persons", []):
-            await queries.create_person_node(person)
-            imported_count += 1
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    finally:
+        # Batches committed before a failure have still changed the graph
+        bump_graph_version()
+
+
+@router.post("/layout")
+async def recompute_layout(
+    full: bool = Query(False),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Compute layout positions for nodes that do not have one yet.
+
+    With `full=true` the whole graph is laid out again from scratch.
+    """
+    try:
+        updated = await update_layout(session, full=full)
+
+        if updated:
+            bump_graph_version()
+
+        return {"message": "Layout updated", "updated": updated}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Import works
-        for work in request.data.get("works", []):
-            await queries.create_work_node(work)
-            imported_count += 1
 
-        # Import relationships
-        for rel in request.data.get("relationships", []):
-            await queries.create_relationship(
-                rel["source_id"], rel["target_id"], rel["relationship_type"], rel.get("description")
-            )
-            imported_count += 1
+@router.post("/lineage")
+async def rebuild_lineage(session: AsyncSession = Depends(get_db_session)):
+    """
+    Rebuild the precomputed master-student lineage relationships.
+    """
+    try:
+        written = await update_lineage(session)
 
-        await session.close()
+        bump_graph_version()
 
-        return {"message": "Import successful", "imported": imported_count}
+        return {"message": "Lineage updated", "relationships": written}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/clear")
-async def clear_graph():
+async def clear_graph(session: AsyncSession = Depends(get_db_session)):
     """
     Clear all nodes and relationships from the graph.
     """
     try:
-        session = await get_session()
         queries = GraphQueries(session)
 
         deleted = await queries.delete_all()
 
-        await session.close()
+        bump_graph_version()
 
         return {"message": "Graph cleared", "deleted": deleted}
 
@@ -189,39 +850,41 @@ async def clear_graph():
 
 
 @router.get("/stats")
-async def get_stats():
+async def get_stats(session: AsyncSession = Depends(get_db_session)):
     """
     Get graph statistics.
     """
+    version = get_graph_version()
+    stats = None if profiling_enabled() else get_cached_stats(version)
+    if stats is not None:
+        return stats
+
     try:
-        session = await get_session()
         queries = GraphQueries(session)
 
-        graph_data = await queries.get_graph_data()
+        stats = await queries.get_stats()
+
+        set_cached_stats(version, stats)
+        return stats
 
-        nodes = graph_data["nodes"]
-        edges = graph_data["edges"]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Count by label
-        label_counts = {}
-        for node in nodes:
-            label = node.get("label", "Unknown")
-            label_counts[label] = label_counts.get(label, 0) + 1
 
-        # Count relationship types
-        rel_counts = {}
-        for edge in edges:
-            rel_type = edge.get("type", "Unknown")
-            rel_counts[rel_type] = rel_counts.get(rel_type, 0) + 1
+@router.get("/admin/profiles", dependencies=[Depends(require_profile_token)])
+async def list_query_profiles():
+    """
+    Get captured Cypher query profiles, newest first.
 
-        await session.close()
+    Profiles are recorded for every query when NEO4J_PROFILE_QUERIES is set,
+    or for requests sent with the ``X-Profile-Queries: 1`` header and a
+    valid ``X-Profile-Token``. Requires ``X-Profile-Token``.
+    """
+    return {"profiles": get_profiles()}
 
-        return {
-            "total_nodes": len(nodes),
-            "total_edges": len(edges),
-            "nodes_by_label": label_counts,
-            "relationships_by_type": rel_counts,
-        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.delete("/admin/profiles", dependencies=[Depends(require_profile_token)])
+async def clear_query_profiles():
+    """Drop all captured Cypher query profiles."""
+    clear_profiles()
+    return {"message": "Profiles cleared"}
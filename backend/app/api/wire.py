@@ -0,0 +1,78 @@
+"""Compact columnar encodings for graph payloads."""
+from typing import Optional
+import json
+
+try:
+    import msgpack
+except ImportError:  # optional dependency, see the "msgpack" extra
+    msgpack = None
+
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.kgcfp.columnar+json"
+
+COLUMNAR_FORMAT = "kgcfp-columnar/1"
+
+
+def negotiate_columnar(accept: str) -> Optional[str]:
+    """Pick a columnar media type from an Accept header, or None for plain JSON."""
+    if MSGPACK_MEDIA_TYPE in accept and msgpack is not None:
+        return MSGPACK_MEDIA_TYPE
+    if COLUMNAR_JSON_MEDIA_TYPE in accept:
+        return COLUMNAR_JSON_MEDIA_TYPE
+    return None
+
+
+def to_columnar(nodes: list[dict], edges: list[dict]) -> dict:
+    """
+    Convert graph nodes and edges into a columnar document.
+
+    Every string is stored once in ``strings`` and referenced by index.
+    Node columns hold string indices, except ``x``/``y`` which hold layout
+    coordinates; edge ``source``/``target`` hold row indices into the node
+    table and ``type`` holds a string index.
+    """
+    strings: list[str] = []
+    string_index: dict[str, int] = {}
+
+    def intern(value) -> int:
+        value = value or ""
+        code = string_index.get(value)
+        if code is None:
+            code = string_index[value] = len(strings)
+            strings.append(value)
+        return code
+
+    node_columns = {"id": [], "label": [], "name": [], "role": [], "dynasty": []}
+    coordinate_columns = {"x": [], "y": []}
+    node_index: dict[str, int] = {}
+    for node in nodes:
+        node_index[node["id"]] = len(node_index)
+        for column, values in node_columns.items():
+            values.append(intern(node.get(column)))
+        for column in ("x", "y"):
+            coordinate_columns[column].append(node.get(column))
+
+    edge_columns = {"source": [], "target": [], "type": []}
+    for edge in edges:
+        source = node_index.get(edge["source"])
+        target = node_index.get(edge["target"])
+        if source is None or target is None:
+            continue
+        edge_columns["source"].append(source)
+        edge_columns["target"].append(target)
+        edge_columns["type"].append(intern(edge["type"]))
+
+    return {
+        "format": COLUMNAR_FORMAT,
+        "strings": strings,
+        "nodes": {**node_columns, **coordinate_columns},
+        "edges": edge_columns,
+    }
+
+
+def encode_columnar(document: dict, media_type: str) -> bytes:
+    """Serialize a columnar document for the negotiated media type."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(document, use_bin_type=True)
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,157 @@
+"""Graph version tracking and in-process caches for KGCFP."""
+import os
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, Optional
+
+
+def _version_file() -> Path:
+    """Path of the version file shared by API workers and the CLI importer."""
+    default = Path(__file__).parent.parent.parent / ".graph_version"
+    return Path(os.getenv("GRAPH_VERSION_FILE", default))
+
+
+def get_graph_version() -> int:
+    """Get the current graph version (0 if the graph was never changed)."""
+    try:
+        return int(_version_file().read_text().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_graph_version() -> int:
+    """
+    Record that the graph changed and return the new version.
+
+    Versions are millisecond timestamps forced to increase, so separate
+    processes bumping concurrently still move every reader off stale data.
+    """
+    version = max(get_graph_version() + 1, int(time.time() * 1000))
+    path = _version_file()
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(str(version))
+    os.replace(tmp_path, path)
+    return version
+
+
+def graph_etag(version: int, variant: str = "") -> str:
+    """
+    Weak ETag for a response computed from a graph version.
+
+    ``variant`` tells apart representations of the same URL, such as the
+    JSON and columnar encodings picked through the Accept header.
+    """
+    return f'W/"{version}-{zlib.crc32(variant.encode("utf-8")):08x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    """Headers sent with version-tagged responses; clients must revalidate."""
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+
+# Cached stats document, tagged with the graph version it was computed for
+_stats_document: Optional[tuple[int, dict]] = None
+
+
+def get_cached_stats(version: int) -> Optional[dict]:
+    """Get the cached stats document if it matches the graph version."""
+    if _stats_document is not None and _stats_document[0] == version:
+        return _stats_document[1]
+    return None
+
+
+def set_cached_stats(version: int, stats: dict) -> None:
+    """Cache the stats document computed for a graph version."""
+    global _stats_document
+    _stats_document = (version, stats)
+
+
+# Cached relationship type names, tagged with the graph version they were read at
+_relationship_types: Optional[tuple[int, list[str]]] = None
+
+
+def get_cached_relationship_types(version: int) -> Optional[list[str]]:
+    """Get the cached relationship types if they match the graph version."""
+    if _relationship_types is not None and _relationship_types[0] == version:
+        return _relationship_types[1]
+    return None
+
+
+def set_cached_relationship_types(version: int, types: list[str]) -> None:
+    """Cache the relationship types read for a graph version."""
+    global _relationship_types
+    _relationship_types = (version, types)
+
+
+class SnapshotCache:
+    """
+    Size-bounded LRU cache of serialized responses for one graph version.
+
+    Entries expire after ``ttl`` seconds, and the whole cache is dropped as
+    soon as it is asked about a newer graph version.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._version: Optional[int] = None
+        self._entries: OrderedDict[Hashable, tuple[float, bytes]] = OrderedDict()
+
+    def _sync_version(self, version: int) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version: int, key: Hashable) -> Optional[bytes]:
+        """Get the cached payload for a key, or None on a miss."""
+        self._sync_version(version)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, version: int, key: Hashable, payload: bytes) -> None:
+        """Store a payload computed for a graph version."""
+        self._sync_version(version)
+        self._entries[key] = (time.monotonic() + self.ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached payload."""
+        self._entries.clear()
+
+
+# Serialized /api/graph pages
+graph_snapshots = SnapshotCache(
+    max_entries=int(os.getenv("GRAPH_CACHE_SIZE", "64")),
+    ttl=float(os.getenv("GRAPH_CACHE_TTL", "300")),
+)
+
+# Serialized per-node and ad-hoc query responses (neighbourhoods, profiles,
+# lineages, paths, timelines), kept apart so browsing nodes cannot evict
+# /api/graph pages
+query_snapshots = SnapshotCache(
+    max_entries=int(os.getenv("GRAPH_QUERY_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("GRAPH_CACHE_TTL", "300")),
+)
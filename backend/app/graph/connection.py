@@ -1,12 +1,83 @@
 """Neo4j graph database connection."""
+import asyncio
 import os
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
 from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession
+from neo4j.api import AsyncBookmarkManager
 
 # Global driver instance
 _driver: Optional[AsyncDriver] = None
 
+# Shared bookmark manager so reads in any request see earlier committed writes
+_bookmark_manager: Optional[AsyncBookmarkManager] = None
+
+
+class PoolStats:
+    """
+    Connection acquisition statistics collected around managed transactions.
+
+    Acquisition latency is measured from the start of a managed transaction
+    call until its transaction function first runs, i.e. pool checkout plus
+    any connection setup and BEGIN.
+    """
+
+    def __init__(self):
+        self.waiting = 0
+        self.acquisitions = 0
+        self.acquisition_seconds_total = 0.0
+        self.acquisition_seconds_max = 0.0
+
+    def begin(self) -> "AcquisitionTicket":
+        """Start tracking one connection acquisition."""
+        self.waiting += 1
+        return AcquisitionTicket(self)
+
+
+class AcquisitionTicket:
+    """Tracks a single acquisition for PoolStats."""
+
+    def __init__(self, stats: PoolStats):
+        self.stats = stats
+        self.started = time.perf_counter()
+        self.pending = True
+
+    def acquired(self) -> None:
+        """Record that a connection was obtained (only the first call counts)."""
+        if not self.pending:
+            return
+        self.pending = False
+        elapsed = time.perf_counter() - self.started
+        self.stats.waiting -= 1
+        self.stats.acquisitions += 1
+        self.stats.acquisition_seconds_total += elapsed
+        self.stats.acquisition_seconds_max = max(self.stats.acquisition_seconds_max, elapsed)
+
+    def done(self) -> None:
+        """Stop tracking, whether or not a connection was obtained."""
+        if self.pending:
+            self.pending = False
+            self.stats.waiting -= 1
+
+
+pool_stats = PoolStats()
+
+
+def _pool_config() -> dict:
+    """Driver connection pool settings read from the environment."""
+    config = {
+        "max_connection_pool_size": int(os.getenv("NEO4J_MAX_POOL_SIZE", "100")),
+        "connection_acquisition_timeout": float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60")),
+        "max_connection_lifetime": float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+        "keep_alive": os.getenv("NEO4J_KEEP_ALIVE", "true").lower() in ("1", "true", "yes"),
+    }
+    liveness_check_timeout = os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT")
+    if liveness_check_timeout:
+        config["liveness_check_timeout"] = float(liveness_check_timeout)
+    return config
+
 
 def get_driver() -> AsyncDriver:
     """Get the Neo4j driver instance."""
@@ -18,24 +89,63 @@ def get_driver() -> AsyncDriver:
 
 async def init_driver() -> None:
     """Initialize the Neo4j driver."""
-    global _driver
+    global _driver, _bookmark_manager
 
     uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     user = os.getenv("NEO4J_USER", "neo4j")
     password = os.getenv("NEO4J_PASSWORD", "")
 
-    _driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+    _driver = AsyncGraphDatabase.driver(uri, auth=(user, password), **_pool_config())
+    _bookmark_manager = AsyncGraphDatabase.bookmark_manager()
 
-    # Test connection
+    # Test connection and pre-open pooled connections
     try:
-        async with _driver.session() as session:
-            await session.run("RETURN 1")
-        print(f"Connected to Neo4j at {uri}")
+        warmed = await _warm_up_pool(int(os.getenv("NEO4J_POOL_WARMUP", "1")))
+        print(f"Connected to Neo4j at {uri} ({warmed} pooled connections warmed)")
     except Exception as e:
         print(f"Warning: Could not connect to Neo4j: {e}")
         raise
 
 
+async def _warm_up_pool(size: int) -> int:
+    """Open ``size`` pooled connections by holding that many transactions at once."""
+    size = max(size, 1)
+    sessions = [_driver.session() for _ in range(size)]
+    try:
+        transactions = await asyncio.gather(*(s.begin_transaction() for s in sessions))
+        results = await asyncio.gather(*(tx.run("RETURN 1") for tx in transactions))
+        await asyncio.gather(*(result.consume() for result in results))
+        await asyncio.gather(*(tx.close() for tx in transactions))
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions))
+    return size
+
+
+def get_pool_stats() -> dict:
+    """Get live connection pool statistics."""
+    # The driver has no public pool API, so read its pool defensively
+    pool = getattr(_driver, "_pool", None)
+    connections = [
+        connection
+        for address_connections in getattr(pool, "connections", {}).values()
+        for connection in address_connections
+    ]
+    in_use = sum(1 for connection in connections if connection.in_use)
+    acquisitions = pool_stats.acquisitions
+    return {
+        "max_size": _pool_config()["max_connection_pool_size"],
+        "open": len(connections),
+        "in_use": in_use,
+        "idle": len(connections) - in_use,
+        "waiting": pool_stats.waiting,
+        "acquisitions": acquisitions,
+        "acquisition_ms_avg": (
+            round(pool_stats.acquisition_seconds_total / acquisitions * 1000, 3) if acquisitions else None
+        ),
+        "acquisition_ms_max": round(pool_stats.acquisition_seconds_max * 1000, 3),
+    }
+
+
 async def close_driver() -> None:
     """Close the Neo4j driver."""
     global _driver
@@ -45,6 +155,22 @@ async def close_driver() -> None:
 
 
 async def get_session() -> AsyncSession:
-    """Get a new Neo4j session."""
+    """Get a new Neo4j session. The caller is responsible for closing it."""
     driver = get_driver()
-    return driver.session()
+    return driver.session(bookmark_manager=_bookmark_manager)
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Open a Neo4j session that is closed however the block exits."""
+    session = await get_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_db_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding a session scoped to the request."""
+    async with session_scope() as session:
+        yield session
@@ -0,0 +1,59 @@
+"""Numeric year properties derived from extracted date ranges."""
+import json
+import re
+from typing import Any, Optional
+
+
+# A year, optionally prefixed with 前 for years before the common era
+_YEAR = re.compile(r"(前)?\s*(-?\d{1,4})")
+
+
+def parse_year(value: Any) -> Optional[int]:
+    """
+    Read a year from an extracted value.
+
+    The extractor writes 0 for unknown years, so 0 is treated as missing.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        year = int(value)
+    elif isinstance(value, str):
+        match = _YEAR.search(value)
+        if not match:
+            return None
+        year = int(match.group(2))
+        if match.group(1):
+            year = -abs(year)
+    else:
+        return None
+    return year or None
+
+
+def _range(value: Any, start_key: str, end_key: str) -> tuple[Optional[int], Optional[int]]:
+    """Read a {start_key, end_key} dict, which may arrive JSON-encoded."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None, None
+    if not isinstance(value, dict):
+        return None, None
+    return parse_year(value.get(start_key)), parse_year(value.get(end_key))
+
+
+def range_years(value: Any) -> dict[str, Optional[int]]:
+    """start_year/end_year of a time_range or tenure {'start', 'end'} dict."""
+    start, end = _range(value, "start", "end")
+    return {"start_year": start, "end_year": end}
+
+
+def person_years(birth_death: Any) -> dict[str, Optional[int]]:
+    """
+    birth_year/death_year of a birth_death {'birth', 'death'} dict.
+
+    The start_year/end_year span is set when the person is written, since a
+    missing birth or death year falls back to the bound of their period.
+    """
+    birth, death = _range(birth_death, "birth", "death")
+    return {"birth_year": birth, "death_year": death}
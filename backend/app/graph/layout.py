@@ -0,0 +1,250 @@
+"""Server-side force-directed graph layout for KGCFP."""
+import asyncio
+from typing import Optional
+
+import numpy as np
+
+
+# Preferred edge length in canvas pixels, matching the frontend's springLength
+SPRING_LENGTH = 150.0
+
+# Rows of the pairwise repulsion matrix computed at once, bounding memory use
+BLOCK_SIZE = 512
+
+# Graphs with more nodes use grid-approximated repulsion
+EXACT_LAYOUT_NODES = 5000
+
+# Average number of nodes per cell of the coarsest repulsion grid tried
+GRID_NODES_PER_CELL = 16
+
+
+def _exact_repulsion(pos: np.ndarray, moving: np.ndarray, k: float, disp: np.ndarray) -> None:
+    """Add the repulsion k^2 / d between every moving node and every node."""
+    x, y = pos[:, 0], pos[:, 1]
+    for start in range(0, moving.size, BLOCK_SIZE):
+        rows = moving[start:start + BLOCK_SIZE]
+        dx = x[rows, None] - x[None, :]
+        dy = y[rows, None] - y[None, :]
+        factor = dx * dx
+        factor += dy * dy
+        np.maximum(factor, 1e-2, out=factor)
+        np.divide(k * k, factor, out=factor)
+        disp[rows, 0] += np.einsum("ij,ij->i", dx, factor)
+        disp[rows, 1] += np.einsum("ij,ij->i", dy, factor)
+
+
+def _grid_cells(pos: np.ndarray) -> tuple[np.ndarray, int]:
+    """
+    Bin nodes into the square grid that minimises the pairs to compare.
+
+    Starting from about GRID_NODES_PER_CELL nodes per cell, the grid is
+    refined while that lowers the near pairs (sum of squared cell sizes,
+    over nine adjacent cells) plus the cell pairs of the far field, so
+    dense regions of the layout do not degrade to all pairs. Returns each
+    node's (column, row) and the number of cells per side.
+    """
+    count = len(pos)
+    low = pos.min(axis=0)
+    extent = max(float((pos.max(axis=0) - low).max()), 1e-9)
+    side = max(int(np.ceil(np.sqrt(count / GRID_NODES_PER_CELL))), 1)
+    best = None
+    while side * side <= 16 * count:
+        cells = np.minimum(((pos - low) / extent * side).astype(np.int64), side - 1)
+        sizes = np.unique(cells[:, 1] * side + cells[:, 0], return_counts=True)[1]
+        cost = 9 * int((sizes * sizes).sum()) + sizes.size * sizes.size
+        if best is not None and cost >= best[0]:
+            break
+        best = (cost, cells, side)
+        side *= 2
+    return best[1], best[2]
+
+
+def _grid_repulsion(pos: np.ndarray, moving: np.ndarray, k: float, disp: np.ndarray) -> None:
+    """
+    Add an approximation of the repulsion between every pair of nodes.
+
+    Nodes are binned into a square grid (see _grid_cells). Nodes in the
+    same or adjacent cells repel each other exactly; every other cell
+    repels as a single mass at its centroid, as in a one-level Barnes-Hut
+    scheme.
+    """
+    count = len(pos)
+    cells, side = _grid_cells(pos)
+    # One empty column/row on each side keeps neighbour keys from wrapping
+    width = side + 2
+    keys = (cells[:, 1] + 1) * width + cells[:, 0] + 1
+
+    # Far field: occupied cells repel through their mass and centroid
+    occupied, inverse, mass = np.unique(keys, return_inverse=True, return_counts=True)
+    cx = np.bincount(inverse, weights=pos[:, 0]) / mass
+    cy = np.bincount(inverse, weights=pos[:, 1]) / mass
+    col, row = occupied % width, occupied // width
+    far = np.zeros((occupied.size, 2))
+    for start in range(0, occupied.size, BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        dx = cx[block, None] - cx[None, :]
+        dy = cy[block, None] - cy[None, :]
+        factor = dx * dx
+        factor += dy * dy
+        np.maximum(factor, 1e-2, out=factor)
+        np.divide(k * k * mass, factor, out=factor)
+        # Adjacent cells are handled pair by pair below
+        adjacent = (np.abs(col[block, None] - col[None, :]) <= 1) & (np.abs(row[block, None] - row[None, :]) <= 1)
+        factor[adjacent] = 0
+        far[block, 0] = np.einsum("ij,ij->i", dx, factor)
+        far[block, 1] = np.einsum("ij,ij->i", dy, factor)
+    disp[moving] += far[inverse[moving]]
+
+    # Near field: every pair of nodes in the same or adjacent cells
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    for dx, dy in ((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+        neighbour = keys[moving] + dy * width + dx
+        start = np.searchsorted(sorted_keys, neighbour, side="left")
+        sizes = np.searchsorted(sorted_keys, neighbour, side="right") - start
+        total = int(sizes.sum())
+        if total == 0:
+            continue
+        rows = np.repeat(moving, sizes)
+        cols = order[np.repeat(start, sizes) + np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)]
+        delta = pos[rows] - pos[cols]
+        factor = k * k / np.maximum((delta ** 2).sum(axis=-1), 1e-2)
+        disp[:, 0] += np.bincount(rows, weights=delta[:, 0] * factor, minlength=count)
+        disp[:, 1] += np.bincount(rows, weights=delta[:, 1] * factor, minlength=count)
+
+
+def compute_layout(
+    node_ids: list[str],
+    edges: list[tuple[str, str]],
+    positions: Optional[dict[str, tuple[float, float]]] = None,
+    iterations: int = 100,
+    seed: int = 0,
+) -> dict[str, tuple[float, float]]:
+    """
+    Compute Fruchterman-Reingold positions for a graph.
+
+    Nodes already present in ``positions`` stay fixed and only the others
+    move, so adding a few nodes to a laid-out graph is cheap. New nodes
+    start near the centroid of their placed neighbours. Returns positions
+    for the nodes that moved.
+
+    Up to EXACT_LAYOUT_NODES nodes, repulsion is computed between every
+    pair of nodes, in O(n^2) time and O(n) memory per iteration. Larger
+    graphs use a grid approximation (see _grid_repulsion) whose cost per
+    iteration grows roughly as O(n^1.5).
+    """
+    positions = positions or {}
+    count = len(node_ids)
+    if count == 0:
+        return {}
+
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    pairs = np.array(
+        [(index[a], index[b]) for a, b in edges if a in index and b in index and a != b],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    source, target = pairs[:, 0], pairs[:, 1]
+
+    rng = np.random.default_rng(seed)
+    side = SPRING_LENGTH * np.sqrt(count)
+    pos = rng.uniform(-side / 2, side / 2, size=(count, 2))
+    movable = np.ones(count, dtype=bool)
+    for node_id, xy in positions.items():
+        i = index.get(node_id)
+        if i is not None and xy[0] is not None and xy[1] is not None:
+            pos[i] = xy
+            movable[i] = False
+
+    moving = np.flatnonzero(movable)
+    if moving.size == 0:
+        return {}
+
+    # Seed new nodes next to their already placed neighbours
+    if moving.size < count:
+        placed = ~movable
+        sums = np.zeros((count, 2))
+        hits = np.zeros(count)
+        for a, b in ((source, target), (target, source)):
+            mask = movable[a] & placed[b]
+            np.add.at(sums, a[mask], pos[b[mask]])
+            np.add.at(hits, a[mask], 1)
+        seeded = movable & (hits > 0)
+        pos[seeded] = sums[seeded] / hits[seeded, None] + rng.normal(
+            scale=SPRING_LENGTH / 2, size=(int(seeded.sum()), 2)
+        )
+
+    repulsion = _exact_repulsion if count <= EXACT_LAYOUT_NODES else _grid_repulsion
+    k = SPRING_LENGTH
+    temperature = side / 10
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        disp = np.zeros((count, 2))
+
+        repulsion(pos, moving, k, disp)
+
+        # Attraction d^2 / k along every edge
+        if source.size:
+            delta = pos[source] - pos[target]
+            dist = np.sqrt((delta ** 2).sum(axis=-1))
+            force = delta * (dist / k)[:, None]
+            np.subtract.at(disp, source, force)
+            np.add.at(disp, target, force)
+
+        disp[~movable] = 0
+        length = np.maximum(np.sqrt((disp ** 2).sum(axis=-1)), 1e-9)
+        pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature = max(temperature - cooling, 1.0)
+
+    return {node_ids[i]: (float(pos[i, 0]), float(pos[i, 1])) for i in moving}
+
+
+async def _read_layout_input(tx) -> tuple[list[str], dict, list[tuple[str, str]]]:
+    """Read node ids, stored positions and edges for a layout run."""
+    result = await tx.run("""
+    MATCH (n:Entity)
+    RETURN n.id AS id, n.layout_x AS x, n.layout_y AS y
+    """)
+    node_ids = []
+    positions = {}
+    async for record in result:
+        node_ids.append(record["id"])
+        if record["x"] is not None and record["y"] is not None:
+            positions[record["id"]] = (record["x"], record["y"])
+
+    result = await tx.run("""
+    MATCH (a:Entity)-[:!LINEAGE]->(b:Entity)
+    RETURN a.id AS source, b.id AS target
+    """)
+    edges = [(record["source"], record["target"]) async for record in result]
+    return node_ids, positions, edges
+
+
+async def _write_positions(tx, rows: list[dict]) -> None:
+    """Store one batch of computed positions on their nodes."""
+    result = await tx.run("""
+    UNWIND $rows AS row
+    MATCH (n:Entity {id: row.id})
+    SET n.layout_x = row.x, n.layout_y = row.y
+    """, {"rows": rows})
+    await result.consume()
+
+
+async def update_layout(session, full: bool = False, batch_size: int = 1000) -> int:
+    """
+    Lay out nodes that have no stored position and save x/y on them.
+
+    With ``full`` every node is laid out again from scratch. Returns the
+    number of nodes whose position was written.
+    """
+    node_ids, positions, edges = await session.execute_read(_read_layout_input)
+    if full:
+        positions = {}
+    elif len(positions) == len(node_ids):
+        return 0
+
+    # Keep the event loop responsive while NumPy does the work
+    moved = await asyncio.to_thread(compute_layout, node_ids, edges, positions)
+    rows = [{"id": node_id, "x": x, "y": y} for node_id, (x, y) in moved.items()]
+    for start in range(0, len(rows), batch_size):
+        await session.execute_write(_write_positions, rows[start:start + batch_size])
+    return len(rows)
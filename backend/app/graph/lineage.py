@@ -0,0 +1,96 @@
+"""Precomputed teaching lineages for KGCFP."""
+import uuid
+from collections import deque
+
+
+# Relationship types, created from social relations, that link a master to a student
+TEACHING_TYPES = ("MASTER_STUDENT",)
+
+# Derived relationship from every master to every transitive student, with
+# the number of generations between them in ``depth``
+LINEAGE_TYPE = "LINEAGE"
+
+
+def compute_closure(edges: list[tuple[str, str]]) -> list[tuple[str, str, int]]:
+    """
+    Compute the transitive closure of master -> student edges.
+
+    Returns (ancestor, descendant, depth) rows where depth is the smallest
+    number of generations between the two. Cycles in the data are tolerated
+    and never produce a node as its own descendant.
+    """
+    students: dict[str, list[str]] = {}
+    for master, student in edges:
+        if master != student:
+            students.setdefault(master, []).append(student)
+
+    rows = []
+    for ancestor in students:
+        depths = {ancestor: 0}
+        queue = deque([ancestor])
+        while queue:
+            node = queue.popleft()
+            for student in students.get(node, ()):
+                if student not in depths:
+                    depths[student] = depths[node] + 1
+                    queue.append(student)
+                    rows.append((ancestor, student, depths[student]))
+    return rows
+
+
+async def _read_teaching_edges(tx) -> list[tuple[str, str]]:
+    """Read every master -> student edge."""
+    result = await tx.run("""
+    MATCH (a:Entity)-[r]->(b:Entity)
+    WHERE type(r) IN $types
+    RETURN a.id AS master, b.id AS student
+    """, {"types": list(TEACHING_TYPES)})
+    return [(record["master"], record["student"]) async for record in result]
+
+
+# Writes one batch of closure rows, stamped with the rebuild that wrote them.
+# MERGE locks both endpoints, so overlapping rebuilds cannot duplicate an edge.
+MERGE_LINEAGE_QUERY = f"""
+UNWIND $rows AS row
+MATCH (a:Entity {{id: row.ancestor}})
+MATCH (b:Entity {{id: row.descendant}})
+MERGE (a)-[l:{LINEAGE_TYPE}]->(b)
+SET l.depth = row.depth, l.build = $build
+"""
+
+# Deletes the lineage relationships a rebuild did not write
+DELETE_STALE_LINEAGE_QUERY = f"""
+MATCH ()-[l:{LINEAGE_TYPE}]->()
+WHERE l.build IS NULL OR l.build <> $build
+DELETE l
+"""
+
+
+async def _replace_lineage(tx, rows: list[dict], batch_size: int) -> None:
+    """
+    Replace every lineage relationship with the given closure rows.
+
+    Runs as a single transaction, so readers keep the previous lineage
+    until the new one is complete.
+    """
+    build = uuid.uuid4().hex
+    for start in range(0, len(rows), batch_size):
+        result = await tx.run(MERGE_LINEAGE_QUERY, {"rows": rows[start:start + batch_size], "build": build})
+        await result.consume()
+    result = await tx.run(DELETE_STALE_LINEAGE_QUERY, {"build": build})
+    await result.consume()
+
+
+async def update_lineage(session, batch_size: int = 1000) -> int:
+    """
+    Rebuild the lineage relationships from the current teaching edges.
+
+    Returns the number of lineage relationships written.
+    """
+    edges = await session.execute_read(_read_teaching_edges)
+    rows = [
+        {"ancestor": ancestor, "descendant": descendant, "depth": depth}
+        for ancestor, descendant, depth in compute_closure(edges)
+    ]
+    await session.execute_write(_replace_lineage, rows, batch_size)
+    return len(rows)
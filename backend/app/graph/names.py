@@ -0,0 +1,36 @@
+"""Display names stored on graph nodes at write time."""
+import json
+from typing import Any, Optional
+
+
+def _localized(value: Any) -> dict:
+    """Read a {'zh': ..., 'en': ...} name, which may arrive JSON-encoded."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {"zh": value}
+    return value if isinstance(value, dict) else {}
+
+
+def display_names(label: str, data: dict) -> dict[str, Optional[str]]:
+    """
+    Compute the display_name, name_zh and name_en properties of a node.
+
+    Persons and periods are named by ``name``, works by ``title`` and
+    iconographies by their localized ``name``; other nodes by their id.
+    """
+    name_zh = name_en = None
+    if label in ("Person", "Period"):
+        name_zh = data.get("name")
+    elif label == "Work":
+        name_zh = data.get("title")
+    elif label == "Iconography":
+        name = _localized(data.get("name"))
+        name_zh, name_en = name.get("zh"), name.get("en")
+
+    return {
+        "display_name": name_zh or name_en or data.get("id", ""),
+        "name_zh": name_zh or None,
+        "name_en": name_en or None,
+    }
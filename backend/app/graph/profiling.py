@@ -0,0 +1,95 @@
+"""Cypher profiling and slow-query logging for KGCFP."""
+import hmac
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Queries slower than this are logged with their parameters
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+# Number of captured query profiles kept for the admin endpoint
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "200"))
+
+# Profile every query, rather than only requests sending the profile header
+PROFILE_ALL = os.getenv("NEO4J_PROFILE_QUERIES", "").lower() in ("1", "true", "yes")
+
+# Secret that X-Profile-Token must carry to profile a request or read the
+# captured profiles; both are disabled while it is unset
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+# Set per request when profiling was asked for through the request header
+profile_requested: ContextVar[bool] = ContextVar("profile_requested", default=False)
+
+_profiles: deque = deque(maxlen=PROFILE_BUFFER_SIZE)
+
+
+def profiling_enabled() -> bool:
+    """Whether the current query should run under PROFILE."""
+    return PROFILE_ALL or profile_requested.get()
+
+
+def profile_token_valid(token: Optional[str]) -> bool:
+    """Whether a client-supplied token grants access to query profiling."""
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def _summarize_plan(plan: dict) -> dict:
+    """Reduce a driver profile tree to operators, rows and db hits."""
+    return {
+        "operator": plan.get("operatorType"),
+        "rows": plan.get("rows"),
+        "db_hits": plan.get("dbHits"),
+        "details": (plan.get("args") or {}).get("Details"),
+        "children": [_summarize_plan(child) for child in plan.get("children", [])],
+    }
+
+
+def _total_db_hits(plan: dict) -> int:
+    return (plan.get("db_hits") or 0) + sum(_total_db_hits(c) for c in plan["children"])
+
+
+def _truncate_params(params: dict, limit: int = 2000) -> str:
+    """Render query parameters for logs without flooding them with batches."""
+    text = json.dumps(params, ensure_ascii=False, default=str)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def record_profile(method: str, query: str, params: dict, elapsed: float, plan: Optional[dict]) -> None:
+    """Store a captured query profile in the ring buffer."""
+    summary = _summarize_plan(plan) if plan else None
+    _profiles.append({
+        "timestamp": time.time(),
+        "method": method,
+        "query": query.strip(),
+        "params": _truncate_params(params),
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "db_hits": _total_db_hits(summary) if summary else None,
+        "plan": summary,
+    })
+
+
+def log_if_slow(method: str, query: str, params: dict, elapsed: float) -> None:
+    """Log a query that took longer than SLOW_QUERY_MS."""
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query in %s (%.1f ms): %s params=%s",
+            method, elapsed_ms, " ".join(query.split()), _truncate_params(params),
+        )
+
+
+def get_profiles() -> list[dict]:
+    """Get captured query profiles, newest first."""
+    return list(reversed(_profiles))
+
+
+def clear_profiles() -> None:
+    """Drop every captured query profile."""
+    _profiles.clear()
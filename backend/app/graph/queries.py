@@ -1,93 +1,402 @@
 """Graph database queries for KGCFP."""
 from typing import Optional
-from neo4j import AsyncSession
+from neo4j import AsyncSession, unit_of_work
+from neo4j.exceptions import ClientError
+import base64
+import itertools
 import json
+import re
+import time
 
+from app.graph.cache import get_cached_relationship_types, get_graph_version, set_cached_relationship_types
+from app.graph.connection import pool_stats
+from app.graph.lineage import LINEAGE_TYPE, TEACHING_TYPES
+from app.graph.dates import person_years
+from app.graph.names import display_names
+from app.graph.profiling import log_if_slow, profiling_enabled, record_profile
+from app.metrics import (
+    CYPHER_CONSUMPTION_SECONDS,
+    CYPHER_EXECUTION_SECONDS,
+    current_query,
+    instrument_queries,
+)
 
+
+# Entity labels in the order used for keyset pagination.
+NODE_LABELS = ("Iconography", "Literature", "Location", "Period", "Person", "Work")
+
+# Labels carrying numeric start_year/end_year properties
+TIMELINE_LABELS = ("Period", "Person", "Work")
+
+# Shared label carried by every entity node, backed by an id index
+ENTITY_LABEL = "Entity"
+
+# Full-text index over name properties, created by Neo4jImporter.create_constraints
+NAME_INDEX = "entity_name_fulltext_v3"
+
+# Relationship types that tie entities to shared hubs (periods, places,
+# themes, sources) rather than to each other; path search skips them
+PATH_EXCLUDED_TYPES = ("ACTIVE_IN", "CRITIQUES", "DATED_TO", "DEPICTS", "RECORDS", "WORKED_AT")
+
+# Literature quality grades from best to worst, as recorded by the extractor
+QUALITY_RANKS = ("神品", "妙品", "能品", "逸品")
+
+# Characters with special meaning in Lucene query syntax
+_LUCENE_SPECIAL = set('+-&|!(){}[]^"~*?:\\/')
+
+
+# Boolean operators of Lucene query syntax, only recognised in upper case
+_LUCENE_OPERATORS = re.compile(r"(?<!\S)(AND|OR|NOT)(?!\S)")
+
+
+def escape_lucene(text: str) -> str:
+    """Escape user input so it is matched literally by a full-text index."""
+    escaped = "".join(f"\\{c}" if c in _LUCENE_SPECIAL else c for c in text)
+    # The index analyzer lowercases terms anyway, so this only disarms them
+    return _LUCENE_OPERATORS.sub(lambda match: match.group().lower(), escaped)
+
+
+async def _collect(tx, query: str, params: dict, ticket=None) -> list:
+    """Transaction function running a query and collecting all its records."""
+    if ticket is not None:
+        ticket.acquired()
+    profiled = profiling_enabled()
+    started = time.perf_counter()
+    result = await tx.run(f"PROFILE {query}" if profiled else query, params)
+    executed = time.perf_counter()
+    records = [record async for record in result]
+    finished = time.perf_counter()
+
+    method = current_query.get() or "unknown"
+    CYPHER_EXECUTION_SECONDS.observe(executed - started, method)
+    CYPHER_CONSUMPTION_SECONDS.observe(finished - executed, method)
+    log_if_slow(method, query, params, finished - started)
+    if profiled:
+        summary = await result.consume()
+        record_profile(method, query, params, finished - started, summary.profile)
+    return records
+
+
+async def _run_batch(tx, query: str, rows: list[dict]) -> None:
+    """Transaction function writing one batch of rows through UNWIND."""
+    profiled = profiling_enabled()
+    started = time.perf_counter()
+    result = await tx.run(f"PROFILE {query}" if profiled else query, {"rows": rows})
+    executed = time.perf_counter()
+    summary = await result.consume()
+    elapsed = time.perf_counter() - started
+
+    method = current_query.get() or "unknown"
+    CYPHER_EXECUTION_SECONDS.observe(executed - started, method)
+    CYPHER_CONSUMPTION_SECONDS.observe(elapsed - (executed - started), method)
+    log_if_slow(method, query, {"rows": rows}, elapsed)
+    if profiled:
+        record_profile(method, query, {"rows": rows}, elapsed, summary.profile)
+
+
+def _batches(rows: list[dict], batch_size: int):
+    """Split rows into consecutive batches of at most batch_size."""
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
+
+
+def _primary_label(var: str) -> str:
+    """Cypher expression for a node's entity label, skipping the shared label."""
+    return f"[l IN labels({var}) WHERE l <> '{ENTITY_LABEL}'][0]"
+
+
+def _snapshot_columns(var: str, label: Optional[str] = None) -> str:
+    """
+    Cypher RETURN columns read by GraphQueries._snapshot_node.
+
+    Expects the node's period to be bound to ``p`` by an OPTIONAL MATCH.
+    """
+    label_expr = f"'{label}'" if label else _primary_label(var)
+    return f"""{var}.id AS id,
+               {label_expr} AS label,
+               coalesce({var}.display_name, {var}.id) AS name,
+               coalesce({var}.primary_role, {var}.status, '') AS role,
+               coalesce(p.name, '') AS dynasty,
+               {var}.layout_x AS x,
+               {var}.layout_y AS y"""
+
+
+# Cypher expression for the period a node belongs to, used to cluster nodes
+_PERIOD_OF = "CASE WHEN {var}:Period THEN {var}.id ELSE {var}.period_ref END"
+
+
+def cluster_id(period_id: Optional[str], label: str) -> str:
+    """Overview cluster of a node: its period if known, otherwise its label."""
+    return f"period:{period_id}" if period_id else f"label:{label}"
+
+
+def cluster_filters(cluster: str) -> tuple[dict[str, str], dict]:
+    """Translate a cluster id into get_graph_page label filters and params."""
+    kind, _, key = cluster.partition(":")
+    if kind == "period" and key:
+        return {
+            "Period": "n.id = $cluster_key",
+            "Person": "n.period_ref = $cluster_key",
+            "Work": "n.period_ref = $cluster_key",
+        }, {"cluster_key": key}
+    if kind == "label" and key in NODE_LABELS and key != "Period":
+        return {key: "n.period_ref IS NULL"}, {}
+    raise ValueError(f"Unknown cluster: {cluster}")
+
+
+# Properties each label can be filtered and counted by; "period_ref" is a
+# Period's own id
+FACET_PROPERTIES = {
+    "Iconography": ("source_book",),
+    "Literature": ("source_book",),
+    "Location": ("source_book",),
+    "Period": ("period_ref", "source_book"),
+    "Person": ("period_ref", "primary_role", "source_book"),
+    "Work": ("period_ref", "status", "support", "source_book"),
+}
+
+# Cypher list of [facet, value] pairs describing node ``n``, nulls dropped
+_FACET_VALUES = f"""[f IN [
+    ['label', {_primary_label("n")}],
+    ['period_ref', {_PERIOD_OF.format(var="n")}],
+    ['primary_role', n.primary_role],
+    ['status', n.status],
+    ['support', n.support],
+    ['source_book', n.source_book]
+] WHERE f[1] IS NOT NULL]"""
+
+
+def facet_filters(
+    facets: dict[str, list[str]], labels: Optional[list[str]] = None
+) -> tuple[dict[str, str], dict]:
+    """
+    Translate facet values into get_graph_page label filters and params.
+
+    Only labels that have every requested facet property are kept, each
+    with an index-backed ``IN`` predicate per facet.
+    """
+    unknown = set(labels or ()) - set(NODE_LABELS)
+    if unknown:
+        raise ValueError(f"Unknown label: {', '.join(sorted(unknown))}")
+
+    filters = {}
+    for label in labels or NODE_LABELS:
+        if not set(facets) <= set(FACET_PROPERTIES[label]):
+            continue
+        predicates = [
+            f"n.{'id' if label == 'Period' and facet == 'period_ref' else facet} IN $facet_{facet}"
+            for facet in sorted(facets)
+        ]
+        filters[label] = " AND ".join(predicates) or "true"
+    return filters, {f"facet_{facet}": values for facet, values in facets.items()}
+
+
+def _filters_predicate(filters: Optional[dict[str, str]]) -> str:
+    """Cypher predicate on ``n`` matching any label filter of get_graph_page."""
+    if filters is None:
+        return "true"
+    if not filters:
+        return "false"
+    return " OR ".join(f"(n:`{label}` AND ({predicate}))" for label, predicate in sorted(filters.items()))
+
+
+def _group_facets(records) -> dict[str, dict[str, int]]:
+    """Nest facet/value/count records into {facet: {value: count}}."""
+    facets = {}
+    for record in records:
+        facets.setdefault(record["facet"], {})[str(record["value"])] = record["count"]
+    return facets
+
+
+def _relationship_pattern(rel_types: Optional[list[str]]) -> str:
+    """Relationship type expression for ``r``, excluding derived lineage edges by default."""
+    if not rel_types:
+        return "r:!LINEAGE"
+    return "r:" + "|".join(f"`{_escape_name(t)}`" for t in rel_types)
+
+
+def _escape_name(name: str) -> str:
+    """Escape a label or relationship type for use inside backticks."""
+    return name.replace("`", "``")
+
+
+def _chains(parents: dict, node_id: str):
+    """Yield (node ids, edges) of every shortest chain from a search root to a node."""
+    if not parents[node_id]:
+        yield [node_id], []
+        return
+    for parent_id, edge in parents[node_id]:
+        for ids, edges in _chains(parents, parent_id):
+            yield ids + [node_id], edges + [edge]
+
+
+def encode_cursor(*values) -> str:
+    """Encode pagination key values into an opaque continuation token."""
+    raw = json.dumps(list(values), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a continuation token holding ``size`` string key values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(value, str) for value in values)
+    ):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+# Every node with the display columns read by GraphQueries._snapshot_node
+_GRAPH_NODES_QUERY = f"""
+MATCH (n)
+OPTIONAL MATCH (p:Period {{id: n.period_ref}})
+RETURN {_snapshot_columns("n")}
+"""
+
+# Every edge as source/target/type
+_GRAPH_EDGES_QUERY = """
+MATCH (a)-[r:!LINEAGE]->(b)
+RETURN a.id AS source, b.id AS target, type(r) AS type
+"""
+
+
+@instrument_queries
 class GraphQueries:
     """Graph database query operations."""
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create_person_node(self, person_data: dict) -> dict:
-        """Create a Person node in Neo4j."""
+    async def _read(self, query: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> list:
+        """
+        Run a query in a managed read transaction and return its records.
+
+        ``timeout`` bounds the transaction on the server, in seconds.
+        """
+        ticket = pool_stats.begin()
+        work = unit_of_work(timeout=timeout)(_collect) if timeout is not None else _collect
+        try:
+            return await self.session.execute_read(work, query, params or {}, ticket)
+        finally:
+            ticket.done()
+
+    async def _write(self, query: str, params: Optional[dict] = None) -> list:
+        """Run a query in a managed write transaction and return its records."""
+        ticket = pool_stats.begin()
+        try:
+            return await self.session.execute_write(_collect, query, params or {}, ticket)
+        finally:
+            ticket.done()
+
+    async def merge_persons(self, persons: list[dict], batch_size: int = 1000) -> int:
+        """Create or update Person nodes in batched write transactions."""
+        # A missing birth or death year falls back to the bound of the
+        # person's period, and to the other year when there is no period
         query = """
-        MERGE (p:Person {id: $id})
-        SET p.primary_role = $primary_role,
-            p.name = $name,
-            p.courtesy_name = $courtesy_name,
-            p.pseudonym = $pseudonym,
-            p.other_names = $other_names,
-            p.choronym = $choronym,
-            p.birth_death = $birth_death,
-            p.period_ref = $period_ref,
-            p.biography = $biography,
-            p.source_book = $source_book
-        RETURN p
-        """
-        result = await self.session.run(query, person_data)
-        record = await result.single()
-        return dict(record["p"]) if record else None
-
-    async def create_work_node(self, work_data: dict) -> dict:
-        """Create a Work node in Neo4j."""
+        UNWIND $rows AS row
+        MERGE (p:Person {id: row.id})
+        SET p:Entity,
+            p.primary_role = row.primary_role,
+            p.name = row.name,
+            p.courtesy_name = row.courtesy_name,
+            p.pseudonym = row.pseudonym,
+            p.other_names = row.other_names,
+            p.choronym = row.choronym,
+            p.birth_death = row.birth_death,
+            p.birth_year = row.birth_year,
+            p.death_year = row.death_year,
+            p.period_ref = row.period_ref,
+            p.biography = row.biography,
+            p.source_book = row.source_book,
+            p.display_name = row.display_name,
+            p.name_zh = row.name_zh,
+            p.name_en = row.name_en
+        WITH p
+        OPTIONAL MATCH (period:Period {id: p.period_ref})
+        SET p.start_year = coalesce(p.birth_year, period.start_year, p.death_year),
+            p.end_year = coalesce(p.death_year, period.end_year, p.birth_year)
+        """
+        persons = [
+            {**row, **display_names("Person", row), **person_years(row.get("birth_death"))}
+            for row in persons
+        ]
+        for batch in _batches(persons, batch_size):
+            await self.session.execute_write(_run_batch, query, batch)
+        return len(persons)
+
+    async def merge_works(self, works: list[dict], batch_size: int = 1000) -> int:
+        """Create or update Work nodes in batched write transactions."""
         query = """
-        MERGE (w:Work {id: $id})
-        SET w.title = $title,
-            w.creator_ref = $creator_ref,
-            w.period_ref = $period_ref,
-            w.icon_ref = $icon_ref,
-            w.status = $status,
-            w.support = $support,
-            w.dimensions = $dimensions,
-            w.repository = $repository,
-            w.description = $description,
-            w.source_book = $source_book
-        RETURN w
-        """
-        result = await self.session.run(query, work_data)
-        record = await result.single()
-        return dict(record["w"]) if record else None
-
-    async def create_relationship(
-        self, source_id: str, target_id: str, rel_type: str, description: Optional[str] = None
-    ) -> dict:
-        """Create a relationship between two nodes."""
-        query = f"""
-        MATCH (a {{id: $source_id}})
-        MATCH (b {{id: $target_id}})
-        MERGE (a)-[r:{rel_type}]->(b)
-        SET r.description = $description
-        RETURN a, r, b
-        """
-        result = await self.session.run(
-            query, {"source_id": source_id, "target_id": target_id, "description": description}
-        )
-        record = await result.single()
-        return dict(record["r"]) if record else None
-
-    def _extract_display_name(self, label: str, node: dict) -> str:
-        """Extract a human-readable name for a node based on its label."""
-        if label == "Person":
-            return node.get("name") or node.get("id", "")
-        if label == "Work":
-            return node.get("title") or node.get("id", "")
-        if label == "Period":
-            return node.get("name") or node.get("id", "")
-        if label == "Iconography":
-            name = node.get("name")
-            if isinstance(name, str):
-                try:
-                    name_dict = json.loads(name)
-                    return name_dict.get("zh") or name_dict.get("en") or node.get("id", "")
-                except Exception:
-                    return name
-            if isinstance(name, dict):
-                return name.get("zh") or name.get("en") or node.get("id", "")
-            return node.get("id", "")
+        UNWIND $rows AS row
+        MERGE (w:Work {id: row.id})
+        SET w:Entity,
+            w.title = row.title,
+            w.creator_ref = row.creator_ref,
+            w.period_ref = row.period_ref,
+            w.icon_ref = row.icon_ref,
+            w.status = row.status,
+            w.support = row.support,
+            w.dimensions = row.dimensions,
+            w.repository = row.repository,
+            w.description = row.description,
+            w.source_book = row.source_book,
+            w.display_name = row.display_name,
+            w.name_zh = row.name_zh,
+            w.name_en = row.name_en
+        WITH w
+        OPTIONAL MATCH (p:Period {id: w.period_ref})
+        SET w.start_year = p.start_year,
+            w.end_year = p.end_year
+        """
+        works = [{**row, **display_names("Work", row)} for row in works]
+        for batch in _batches(works, batch_size):
+            await self.session.execute_write(_run_batch, query, batch)
+        return len(works)
+
+    async def merge_relationships(self, relationships: list[dict], batch_size: int = 1000) -> int:
+        """
+        Create or update relationships in batched write transactions.
+
+        Rows are grouped by relationship_type so that each batch is written by
+        a single UNWIND query with a static relationship type.
+        """
+        by_type: dict[str, list[dict]] = {}
+        for rel in relationships:
+            by_type.setdefault(rel["relationship_type"], []).append({
+                "source_id": rel["source_id"],
+                "target_id": rel["target_id"],
+                "description": rel.get("description"),
+            })
 
-        return node.get("id", "")
+        for rel_type, rows in by_type.items():
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (a:Entity {{id: row.source_id}})
+            MATCH (b:Entity {{id: row.target_id}})
+            MERGE (a)-[r:`{_escape_name(rel_type)}`]->(b)
+            SET r.description = row.description
+            """
+            for batch in _batches(rows, batch_size):
+                await self.session.execute_write(_run_batch, query, batch)
+        return len(relationships)
+
+    def _snapshot_node(self, record) -> dict:
+        """Build a graph snapshot node from a record with display columns."""
+        return {
+            'id': record["id"],
+            'label': record["label"],
+            'name': record["name"],
+            'role': record["role"],
+            'dynasty': record["dynasty"],
+            'x': record["x"],
+            'y': record["y"],
+        }
 
     async def get_all_nodes(self, limit: int = 100) -> list[dict]:
         """Get all nodes from the graph."""
@@ -96,105 +405,850 @@ class GraphQueries:
         RETURN n
         LIMIT $limit
         """
-        result = await self.session.run(query, {"limit": limit})
-        records = await result.data()
+        records = await self._read(query, {"limit": limit})
         return [dict(r["n"]) for r in records]
 
     async def get_all_edges(self, limit: int = 200) -> list[dict]:
         """Get all edges from the graph."""
         query = """
-        MATCH (a)-[r]->(b)
+        MATCH (a)-[r:!LINEAGE]->(b)
         RETURN a.id AS source, b.id AS target, type(r) AS type, r.description AS description
         LIMIT $limit
         """
-        result = await self.session.run(query, {"limit": limit})
-        records = await result.data()
-        return records
+        records = await self._read(query, {"limit": limit})
+        return [r.data() for r in records]
+
+    async def _stream(self, query: str):
+        """Run a query and yield its records as they arrive."""
+        # Auto-commit query so records can be streamed as they arrive; a
+        # managed transaction would have to buffer the whole result.
+        method = current_query.get() or "unknown"
+        started = time.perf_counter()
+        result = await self.session.run(query)
+        executed = time.perf_counter()
+        CYPHER_EXECUTION_SECONDS.observe(executed - started, method)
+
+        # Only time spent waiting on the database counts as consumption,
+        # not the time the caller takes between records
+        consuming = 0.0
+        records = aiter(result)
+        try:
+            while True:
+                pulled = time.perf_counter()
+                try:
+                    record = await anext(records)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    consuming += time.perf_counter() - pulled
+                yield record
+        finally:
+            CYPHER_CONSUMPTION_SECONDS.observe(consuming, method)
+            log_if_slow(method, query, {}, executed - started + consuming)
+
+    async def iter_graph_nodes(self):
+        """Stream every node with the properties needed for display."""
+        async for record in self._stream(_GRAPH_NODES_QUERY):
+            yield self._snapshot_node(record)
+
+    async def iter_graph_edges(self):
+        """Stream every edge as a source/target/type dict."""
+        async for record in self._stream(_GRAPH_EDGES_QUERY):
+            yield record.data()
 
     async def get_graph_data(self) -> dict:
         """Get complete graph data (nodes and edges)."""
-        # Get nodes
-        nodes_query = """
-        MATCH (n)
-        RETURN n.id AS id, labels(n)[0] AS label, n.id AS raw_id
+        # Fetch every node together with the properties needed for display
+        # in a single query instead of one lookup per node.
+        nodes = [self._snapshot_node(record) for record in await self._read(_GRAPH_NODES_QUERY)]
+        edges = [record.data() for record in await self._read(_GRAPH_EDGES_QUERY)]
+
+        return {"nodes": nodes, "edges": edges}
+
+    async def get_graph_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[list] = None,
+        filters: Optional[dict[str, str]] = None,
+        params: Optional[dict] = None,
+        rel_types: Optional[list[str]] = None,
+    ) -> dict:
         """
-        nodes_result = await self.session.run(nodes_query)
-        raw_nodes = await nodes_result.data()
+        Get one page of graph data, keyset-paginated by (label, id).
+
+        Each page holds up to ``limit`` nodes together with their outgoing
+        edges, so walking every page yields every node and edge exactly once.
+        ``filters`` optionally restricts the walk to some labels, mapping each
+        label to an extra Cypher predicate on ``n`` that may use ``params``,
+        and ``rel_types`` restricts the edges returned.
+        """
+        if filters is None:
+            filters = {label: "true" for label in NODE_LABELS}
+        labels = sorted(filters)
+        if not labels:
+            return {"nodes": [], "edges": [], "next_cursor": None}
+        after_label, after_id = cursor if cursor else (labels[0], "")
 
-        # Process nodes to extract display names
         nodes = []
-        for n in raw_nodes:
-            node_id = n.get('id', '')
-            label = n.get('label', '')
-
-            # Get name based on label
-            name_query = f"""
-            MATCH (n {{id: $id}})
-            RETURN n
-            """
-            name_result = await self.session.run(name_query, {"id": node_id})
-            name_record = await name_result.single()
-
-            if name_record:
-                node_data = dict(name_record['n'])
-                display_name = self._extract_display_name(label, node_data)
-                nodes.append({
-                    'id': node_id,
-                    'label': label,
-                    'name': display_name,
-                    'role': node_data.get('primary_role', node_data.get('status', '')),
-                    'dynasty': ''
-                })
-
-        # Get edges
-        edges_result = await self.session.run("""
-        MATCH (a)-[r]->(b)
-        RETURN a.id AS source, b.id AS target, type(r) AS type
+        edges = []
+        next_cursor = None
+        for label in labels:
+            if label < after_label:
+                continue
+            remaining = limit - len(nodes)
+            if remaining <= 0:
+                break
+
+            # Seek through the per-label id index and resume after the cursor
+            records = await self._read(f"""
+            MATCH (n:`{label}`)
+            WHERE n.id > $after_id AND ({filters[label]})
+            WITH n
+            ORDER BY n.id
+            LIMIT $limit
+            OPTIONAL MATCH (p:Period {{id: n.period_ref}})
+            RETURN {_snapshot_columns("n", label)},
+                   [(n)-[{_relationship_pattern(rel_types)}]->(m) | {{target: m.id, type: type(r)}}] AS edges
+            ORDER BY id
+            """, {
+                **(params or {}),
+                "after_id": after_id if label == after_label else "",
+                "limit": remaining,
+            })
+
+            for record in records:
+                nodes.append(self._snapshot_node(record))
+                edges.extend(
+                    {"source": record["id"], "target": e["target"], "type": e["type"]}
+                    for e in record["edges"]
+                )
+                next_cursor = [label, record["id"]]
+
+        if len(nodes) < limit:
+            next_cursor = None
+
+        return {"nodes": nodes, "edges": edges, "next_cursor": next_cursor}
+
+    async def get_overview(self, max_clusters: int = 200) -> dict:
+        """
+        Get a clustered overview of the graph.
+
+        Nodes are grouped by period (or by label when they have none) into
+        super-nodes, and edges are aggregated into weighted links between
+        them. Only the largest ``max_clusters`` - 1 clusters are kept; the
+        rest are merged into a single "other" cluster.
+        """
+        period_a = _PERIOD_OF.format(var="a")
+        period_b = _PERIOD_OF.format(var="b")
+        records = await self._read(f"""
+        MATCH (n:Entity)
+        WITH {_PERIOD_OF.format(var="n")} AS period_id, {_primary_label("n")} AS label
+        WITH period_id, label, count(*) AS size
+        OPTIONAL MATCH (p:Period {{id: period_id}})
+        RETURN period_id, p.name AS period_name, label, size
         """)
-        edges = await edges_result.data()
 
-        return {"nodes": nodes, "edges": edges}
+        clusters = {}
+        for record in records:
+            key = cluster_id(record["period_id"], record["label"])
+            cluster = clusters.setdefault(key, {
+                "id": key,
+                "name": record["period_name"] or record["period_id"] or record["label"],
+                "size": 0,
+                "labels": {},
+                "merged": [],
+            })
+            cluster["size"] += record["size"]
+            cluster["labels"][record["label"]] = cluster["labels"].get(record["label"], 0) + record["size"]
 
-    async def search_nodes(self, query: str) -> list[dict]:
-        """Search nodes by name or title."""
-        search_query = """
-        MATCH (n)
-        WHERE n.id CONTAINS $query
-        RETURN n.id AS id, labels(n)[0] AS label, n.id AS name
-        LIMIT 20
+        # Keep the largest clusters and fold the long tail into "other"
+        ranked = sorted(clusters.values(), key=lambda c: c["size"], reverse=True)
+        if len(ranked) > max_clusters:
+            kept, tail = ranked[:max_clusters - 1], ranked[max_clusters - 1:]
+            other = {"id": "other", "name": "Other", "size": 0, "labels": {}, "merged": []}
+            for cluster in tail:
+                other["size"] += cluster["size"]
+                other["merged"].append(cluster["id"])
+                for label, size in cluster["labels"].items():
+                    other["labels"][label] = other["labels"].get(label, 0) + size
+            ranked = kept + [other]
+        remap = {merged: "other" for c in ranked for merged in c["merged"]}
+
+        records = await self._read(f"""
+        MATCH (a:Entity)-[r:!LINEAGE]->(b:Entity)
+        RETURN {period_a} AS period_a,
+               {_primary_label("a")} AS label_a,
+               {period_b} AS period_b,
+               {_primary_label("b")} AS label_b,
+               type(r) AS type,
+               count(*) AS weight
+        """)
+
+        links = {}
+        for record in records:
+            source = cluster_id(record["period_a"], record["label_a"])
+            target = cluster_id(record["period_b"], record["label_b"])
+            source, target = remap.get(source, source), remap.get(target, target)
+            link = links.setdefault((source, target), {
+                "source": source, "target": target, "weight": 0, "types": {},
+            })
+            link["weight"] += record["weight"]
+            link["types"][record["type"]] = link["types"].get(record["type"], 0) + record["weight"]
+
+        return {"nodes": ranked, "edges": list(links.values())}
+
+    async def get_snapshot_node(self, node_id: str) -> Optional[dict]:
+        """Get a single node with the display columns used by graph snapshots."""
+        records = await self._read(f"""
+        MATCH (n:Entity {{id: $id}})
+        OPTIONAL MATCH (p:Period {{id: n.period_ref}})
+        RETURN {_snapshot_columns("n")}
+        """, {"id": node_id})
+        record = records[0] if records else None
+        return self._snapshot_node(record) if record else None
+
+    async def expand_frontier(
+        self,
+        node_ids: list[str],
+        fanout: int,
+        exclude_types: Optional[list[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> list[dict]:
+        """
+        Get the neighbours of a set of nodes, in either direction.
+
+        At most ``fanout`` relationships are followed per frontier node.
+        Returns dicts with the frontier node id, the neighbour as a snapshot
+        node and the connecting edge.
+        """
+        records = await self._read(f"""
+        UNWIND $ids AS node_id
+        MATCH (n:Entity {{id: node_id}})
+        CALL {{
+            WITH n
+            MATCH (n)-[r:!LINEAGE]-(m)
+            WHERE NOT type(r) IN $exclude_types
+            RETURN r, m
+            LIMIT $fanout
+        }}
+        OPTIONAL MATCH (p:Period {{id: m.period_ref}})
+        RETURN n.id AS from_id,
+               {_snapshot_columns("m")},
+               startNode(r) = n AS outgoing,
+               type(r) AS type
+        """, {"ids": node_ids, "fanout": fanout, "exclude_types": list(exclude_types or [])}, timeout)
+
+        rows = []
+        for record in records:
+            if record["outgoing"]:
+                source, target = record["from_id"], record["id"]
+            else:
+                source, target = record["id"], record["from_id"]
+            rows.append({
+                "from_id": record["from_id"],
+                "node": self._snapshot_node(record),
+                "edge": {"source": source, "target": target, "type": record["type"]},
+            })
+        return rows
+
+    async def get_neighborhood(
+        self, node_id: str, hops: int = 1, max_nodes: int = 100, fanout: int = 50
+    ) -> Optional[dict]:
+        """
+        Get the k-hop ego graph around a node, expanded breadth-first.
+
+        The subgraph is capped at ``max_nodes`` nodes and ``fanout`` edges per
+        expanded node; ``truncated`` reports whether a cap was hit.
+        """
+        center = await self.get_snapshot_node(node_id)
+        if center is None:
+            return None
+
+        nodes = {node_id: center}
+        edges = {}
+        truncated = False
+        frontier = [node_id]
+        for _ in range(hops):
+            next_frontier = []
+            followed = {}
+            # Ask for one extra edge per node to detect when fan-out is capped
+            for row in await self.expand_frontier(frontier, fanout + 1):
+                followed[row["from_id"]] = followed.get(row["from_id"], 0) + 1
+                if followed[row["from_id"]] > fanout:
+                    truncated = True
+                    continue
+
+                neighbor = row["node"]
+                if neighbor["id"] not in nodes:
+                    if len(nodes) >= max_nodes:
+                        truncated = True
+                        continue
+                    nodes[neighbor["id"]] = neighbor
+                    next_frontier.append(neighbor["id"])
+                edge = row["edge"]
+                edges[(edge["source"], edge["target"], edge["type"])] = edge
+
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        return {
+            "center": node_id,
+            "nodes": list(nodes.values()),
+            "edges": list(edges.values()),
+            "truncated": truncated,
+        }
+
+    async def find_paths(
+        self,
+        source_id: str,
+        target_id: str,
+        max_hops: int = 4,
+        k: int = 3,
+        fanout: int = 100,
+        max_expansions: int = 2000,
+        time_budget: float = 2.0,
+    ) -> Optional[dict]:
+        """
+        Find up to ``k`` shortest undirected paths between two nodes.
+
+        Runs a breadth-first search from both ends, always expanding the
+        smaller frontier and skipping PATH_EXCLUDED_TYPES. The search stops
+        after ``max_expansions`` expanded nodes or ``time_budget`` seconds,
+        in which case ``truncated`` is set and the paths found so far are
+        returned.
+        """
+        source = await self.get_snapshot_node(source_id)
+        target = await self.get_snapshot_node(target_id)
+        if source is None or target is None:
+            return None
+
+        deadline = time.monotonic() + time_budget
+        nodes = {source_id: source, target_id: target}
+        # Per side: distance from its root and the edges reaching each node
+        # on a shortest chain from that root
+        sides = [
+            {"dist": {source_id: 0}, "parents": {source_id: []}, "frontier": [source_id]},
+            {"dist": {target_id: 0}, "parents": {target_id: []}, "frontier": [target_id]},
+        ]
+        meetings = {source_id} if source_id == target_id else set()
+        paths = []
+        expanded = 0
+        truncated = False
+
+        while True:
+            paths = self._join_chains(sides, meetings, k, max_hops)
+            hops = max(sides[0]["dist"].values()) + max(sides[1]["dist"].values())
+            if len(paths) >= k or hops >= max_hops:
+                break
+            open_sides = [side for side in sides if side["frontier"]]
+            if not open_sides:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or expanded >= max_expansions:
+                truncated = True
+                break
+
+            side = min(open_sides, key=lambda s: len(s["frontier"]))
+            other = sides[1] if side is sides[0] else sides[0]
+            frontier = side["frontier"][:max_expansions - expanded]
+            truncated = truncated or len(frontier) < len(side["frontier"])
+            expanded += len(frontier)
+            depth = side["dist"][frontier[0]] + 1
+
+            next_frontier = []
+            followed = {}
+            try:
+                # Ask for one extra edge per node to detect when fan-out is capped
+                for row in await self.expand_frontier(frontier, fanout + 1, PATH_EXCLUDED_TYPES, remaining):
+                    followed[row["from_id"]] = followed.get(row["from_id"], 0) + 1
+                    if followed[row["from_id"]] > fanout:
+                        truncated = True
+                        continue
+
+                    neighbor_id = row["node"]["id"]
+                    known = side["dist"].get(neighbor_id)
+                    if known is None:
+                        side["dist"][neighbor_id] = depth
+                        side["parents"][neighbor_id] = []
+                        next_frontier.append(neighbor_id)
+                        nodes.setdefault(neighbor_id, row["node"])
+                    elif known != depth:
+                        continue
+                    side["parents"][neighbor_id].append((row["from_id"], row["edge"]))
+                    if neighbor_id in other["dist"]:
+                        meetings.add(neighbor_id)
+            except ClientError as e:
+                if "TransactionTimedOut" not in (e.code or ""):
+                    raise
+                truncated = True
+                break
+            side["frontier"] = next_frontier
+
+        path_node_ids = {node_id for path in paths for node_id in path["nodes"]}
+        return {
+            "source": source_id,
+            "target": target_id,
+            "paths": paths,
+            "nodes": [nodes[node_id] for node_id in path_node_ids],
+            "expanded": expanded,
+            "truncated": truncated,
+        }
+
+    @staticmethod
+    def _join_chains(sides: list[dict], meetings: set, k: int, max_hops: int) -> list[dict]:
+        """Combine chains from both search roots through their meeting nodes."""
+        forward, backward = sides
+        candidates = {}
+        for meeting in sorted(meetings, key=lambda m: forward["dist"][m] + backward["dist"][m]):
+            if forward["dist"][meeting] + backward["dist"][meeting] > max_hops:
+                continue
+            for ids, edges in itertools.islice(_chains(forward["parents"], meeting), k):
+                for back_ids, back_edges in itertools.islice(_chains(backward["parents"], meeting), k):
+                    path_ids = ids + back_ids[-2::-1]
+                    # Chains through a meeting node may cross each other
+                    if len(set(path_ids)) != len(path_ids):
+                        continue
+                    candidates.setdefault(tuple(path_ids), edges + back_edges[::-1])
+
+        ranked = sorted(candidates.items(), key=lambda item: len(item[1]))[:k]
+        return [{"nodes": list(ids), "edges": edges, "length": len(edges)} for ids, edges in ranked]
+
+    async def get_lineage(
+        self, node_id: str, direction: str = "descendants", max_depth: int = 5
+    ) -> Optional[dict]:
+        """
+        Get a node's students or masters within ``max_depth`` generations.
+
+        Reads the precomputed lineage relationships, so no variable-length
+        expansion is needed. Returns the lineage nodes with their ``depth``
+        and the direct teaching edges between them.
+        """
+        center = await self.get_snapshot_node(node_id)
+        if center is None:
+            return None
+
+        pattern = "(n)-[l:LINEAGE]->(m)" if direction == "descendants" else "(n)<-[l:LINEAGE]-(m)"
+        records = await self._read(f"""
+        MATCH (n:Entity {{id: $id}})
+        MATCH {pattern}
+        WHERE l.depth <= $max_depth
+        OPTIONAL MATCH (p:Period {{id: m.period_ref}})
+        RETURN {_snapshot_columns("m")}, l.depth AS depth
+        ORDER BY depth, id
+        """, {"id": node_id, "max_depth": max_depth})
+        nodes = [{**self._snapshot_node(record), "depth": record["depth"]} for record in records]
+
+        ids = [node_id] + [node["id"] for node in nodes]
+        edge_records = await self._read("""
+        UNWIND $ids AS id
+        MATCH (a:Entity {id: id})-[r]->(b:Entity)
+        WHERE type(r) IN $types AND b.id IN $ids
+        RETURN a.id AS source, b.id AS target, type(r) AS type
+        """, {"ids": ids, "types": list(TEACHING_TYPES)})
+
+        return {
+            "center": center,
+            "direction": direction,
+            "nodes": nodes,
+            "edges": [r.data() for r in edge_records],
+        }
+
+    async def get_timeline(
+        self,
+        start: int,
+        end: int,
+        labels: Optional[list[str]] = None,
+        limit: int = 500,
+    ) -> list[dict]:
+        """
+        Get the nodes whose year range overlaps [start, end], earliest first.
+
+        Each label is matched with a range predicate on its indexed
+        start_year; works take their years from their period.
+        """
+        branches = "\n            UNION ALL\n            ".join(
+            f"MATCH (n:`{label}`) WHERE n.start_year <= $end AND n.end_year >= $start RETURN n"
+            for label in sorted(labels or TIMELINE_LABELS)
+        )
+        records = await self._read(f"""
+        CALL {{
+            {branches}
+        }}
+        WITH n
+        ORDER BY n.start_year, n.id
+        LIMIT $limit
+        OPTIONAL MATCH (p:Period {{id: n.period_ref}})
+        RETURN {_snapshot_columns("n")},
+               n.start_year AS start_year,
+               n.end_year AS end_year
+        ORDER BY start_year, id
+        """, {"start": start, "end": end, "limit": limit})
+        return [
+            {**self._snapshot_node(record), "start_year": record["start_year"], "end_year": record["end_year"]}
+            for record in records
+        ]
+
+    async def _relationship_types(self) -> list[str]:
+        """Get every relationship type known to the database."""
+        # Types only appear through imports, which bump the graph version
+        version = get_graph_version()
+        rel_types = get_cached_relationship_types(version)
+        if rel_types is None:
+            records = await self._read(
+                "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType"
+            )
+            rel_types = [r["relationshipType"] for r in records]
+            set_cached_relationship_types(version, rel_types)
+        return rel_types
+
+    async def get_stats(self) -> dict:
+        """Get node and relationship counts from the count store."""
+        labels_records = await self._read("CALL db.labels() YIELD label RETURN label")
+        labels = [r["label"] for r in labels_records if r["label"] != ENTITY_LABEL]
+        # Derived lineage relationships are not part of the imported graph
+        rel_types = [t for t in await self._relationship_types() if t != LINEAGE_TYPE]
+
+        # Each branch is a single-label or single-type count, which Neo4j
+        # answers from its count store without touching the data. The count
+        # is taken before the constant columns are added: constants next to
+        # an aggregation become grouping keys, which the count store cannot
+        # answer.
+        branches = ["MATCH (n) WITH count(n) AS count RETURN 'node' AS kind, null AS key, count"]
+        params = {}
+        for i, label in enumerate(labels):
+            branches.append(
+                f"MATCH (n:`{_escape_name(label)}`) WITH count(n) AS count "
+                f"RETURN 'label' AS kind, $label_{i} AS key, count"
+            )
+            params[f"label_{i}"] = label
+        for i, rel_type in enumerate(rel_types):
+            branches.append(
+                f"MATCH ()-[r:`{_escape_name(rel_type)}`]->() WITH count(r) AS count "
+                f"RETURN 'type' AS kind, $type_{i} AS key, count"
+            )
+            params[f"type_{i}"] = rel_type
+
+        records = await self._read("\nUNION ALL\n".join(branches), params)
+
+        stats = {
+            "total_nodes": 0,
+            "total_edges": 0,
+            "nodes_by_label": {},
+            "relationships_by_type": {},
+        }
+        for record in records:
+            kind, key, count = record["kind"], record["key"], record["count"]
+            if kind == "node":
+                stats["total_nodes"] = count
+            elif kind == "label" and count:
+                stats["nodes_by_label"][key] = count
+            elif kind == "type" and count:
+                stats["relationships_by_type"][key] = count
+        stats["total_edges"] = sum(stats["relationships_by_type"].values())
+        return stats
+
+    async def search_nodes(
+        self,
+        query: str,
+        filters: Optional[dict[str, str]] = None,
+        params: Optional[dict] = None,
+        limit: int = 20,
+    ) -> list[dict]:
         """
-        result = await self.session.run(search_query, {"query": query})
-        return await result.data()
+        Search nodes by name, title or alias, ranked by relevance.
+
+        ``filters`` restricts results like in get_graph_page.
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        search_query = f"""
+        CALL db.index.fulltext.queryNodes('{NAME_INDEX}', $query) YIELD node AS n, score
+        WHERE {_filters_predicate(filters)}
+        RETURN n.id AS id,
+               {_primary_label("n")} AS label,
+               coalesce(n.display_name, n.id) AS name,
+               score
+        LIMIT $limit
+        """
+        records = await self._read(
+            search_query, {**(params or {}), "query": escape_lucene(query), "limit": limit}
+        )
+        return [r.data() for r in records]
+
+    async def search_facets(
+        self,
+        query: str,
+        filters: Optional[dict[str, str]] = None,
+        params: Optional[dict] = None,
+    ) -> dict[str, dict[str, int]]:
+        """Count every search match by facet value."""
+        query = query.strip()
+        if not query:
+            return {}
+
+        records = await self._read(f"""
+        CALL db.index.fulltext.queryNodes('{NAME_INDEX}', $query) YIELD node AS n
+        WHERE {_filters_predicate(filters)}
+        UNWIND {_FACET_VALUES} AS f
+        RETURN f[0] AS facet, f[1] AS value, count(*) AS count
+        """, {**(params or {}), "query": escape_lucene(query)})
+        return _group_facets(records)
+
+    async def get_facet_counts(
+        self,
+        filters: Optional[dict[str, str]] = None,
+        params: Optional[dict] = None,
+        rel_types: Optional[list[str]] = None,
+    ) -> dict[str, dict[str, int]]:
+        """
+        Count the nodes selected by get_graph_page filters by facet value.
+
+        Outgoing edges of the selected nodes are counted per type under the
+        ``relationship_type`` facet.
+        """
+        if filters is None:
+            filters = {label: "true" for label in NODE_LABELS}
+        if not filters:
+            return {}
+
+        branches = "\n            UNION ALL\n            ".join(
+            f"MATCH (n:`{label}`) WHERE {predicate} RETURN n"
+            for label, predicate in sorted(filters.items())
+        )
+        records = await self._read(f"""
+        CALL {{
+            {branches}
+        }}
+        UNWIND {_FACET_VALUES} + [(n)-[{_relationship_pattern(rel_types)}]->() | ['relationship_type', type(r)]] AS f
+        RETURN f[0] AS facet, f[1] AS value, count(*) AS count
+        """, params or {})
+        return _group_facets(records)
 
     async def get_node_details(self, node_id: str) -> Optional[dict]:
         """Get detailed information about a node."""
         query = """
-        MATCH (n {id: $id})
+        MATCH (n:Entity {id: $id})
         RETURN n
         """
-        result = await self.session.run(query, {"id": node_id})
-        record = await result.single()
+        records = await self._read(query, {"id": node_id})
+        record = records[0] if records else None
         return dict(record["n"]) if record else None
 
-    async def get_node_relationships(self, node_id: str) -> list[dict]:
-        """Get all relationships for a node."""
+    async def _degree_columns(self) -> tuple[str, list[str]]:
+        """
+        Cypher list of per-type degree maps for ``n``, and the types it uses.
+
+        Each count names its type explicitly, which Neo4j answers from the
+        node's relationship degree store instead of walking every edge.
+        """
+        rel_types = [t for t in await self._relationship_types() if t != LINEAGE_TYPE]
+        columns = ",\n               ".join(
+            f"{{type: $types[{i}], "
+            f"outgoing: COUNT {{ (n)-[:`{_escape_name(t)}`]->() }}, "
+            f"incoming: COUNT {{ (n)<-[:`{_escape_name(t)}`]-() }}}}"
+            for i, t in enumerate(rel_types)
+        )
+        return f"[{columns}]", rel_types
+
+    async def get_node_summary(self, node_id: str) -> Optional[dict]:
+        """Get a node's properties and its per-type degrees in one query."""
+        columns, rel_types = await self._degree_columns()
+        query = f"""
+        MATCH (n:Entity {{id: $id}})
+        RETURN n, {columns} AS degrees
+        """
+        records = await self._read(query, {"id": node_id, "types": rel_types})
+        if not records:
+            return None
+        return {
+            "node": dict(records[0]["n"]),
+            "degrees": [d for d in records[0]["degrees"] if d["outgoing"] or d["incoming"]],
+        }
+
+    async def get_node_relationships(
+        self,
+        node_id: str,
+        direction: str = "both",
+        types: Optional[list[str]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """
+        Get one page of a node's relationships.
+
+        ``direction`` is "out", "in" or "both" and ``types`` optionally
+        restricts the relationship types. Pages are ordered by type and
+        relationship element id, and ``next_cursor`` continues after the last
+        relationship returned.
+        """
+        pattern = {
+            "out": "(n)-[r:!LINEAGE]->(m)",
+            "in": "(n)<-[r:!LINEAGE]-(m)",
+            "both": "(n)-[r:!LINEAGE]-(m)",
+        }[direction]
+        after_type, after_rel = decode_cursor(cursor, 2) if cursor else (None, None)
+
+        query = f"""
+        MATCH (n:Entity {{id: $id}})
+        MATCH {pattern}
+        WHERE ($types IS NULL OR type(r) IN $types)
+          AND ($after_type IS NULL
+               OR type(r) > $after_type
+               OR (type(r) = $after_type AND elementId(r) > $after_rel))
+        RETURN elementId(r) AS relationship_id,
+               CASE WHEN startNode(r) = n THEN 'out' ELSE 'in' END AS direction,
+               m.id AS target_id,
+               m.id AS target_name,
+               {_primary_label("m")} AS target_label,
+               type(r) AS relationship_type,
+               r.description AS description
+        ORDER BY relationship_type, relationship_id
+        LIMIT $limit
+        """
+        records = await self._read(query, {
+            "id": node_id,
+            "types": types or None,
+            "after_type": after_type,
+            "after_rel": after_rel,
+            "limit": limit + 1,
+        })
+        relationships = [r.data() for r in records[:limit]]
+
+        next_cursor = None
+        if len(records) > limit:
+            last = relationships[-1]
+            next_cursor = encode_cursor(last["relationship_type"], last["relationship_id"])
+        return {"relationships": relationships, "next_cursor": next_cursor}
+
+    async def get_node_profile(
+        self, node_id: str, top_works: int = 10, top_literature: int = 10, per_type: int = 10
+    ) -> Optional[dict]:
+        """
+        Get everything a node detail page shows in a single query.
+
+        Returns the node, its period, its relationships grouped by type and
+        direction (with counts and up to ``per_type`` neighbours each), its
+        most recorded works and the literature about it, best quality first.
+        """
+        query = f"""
+        MATCH (n:Entity {{id: $id}})
+        OPTIONAL MATCH (p:Period {{id: n.period_ref}})
+        CALL {{
+            WITH n
+            MATCH (n)-[r:!LINEAGE]-(m)
+            WITH type(r) AS type, startNode(r) = n AS outgoing, m
+            ORDER BY m.id
+            WITH type, outgoing, count(*) AS count, collect(m)[..$per_type] AS sample
+            ORDER BY type, outgoing DESC
+            RETURN collect({{
+                type: type,
+                direction: CASE WHEN outgoing THEN 'out' ELSE 'in' END,
+                count: count,
+                nodes: [m IN sample | m {{.id, name: coalesce(m.display_name, m.id), label: {_primary_label("m")}}}]
+            }}) AS relationships
+        }}
+        RETURN n {{.*, label: {_primary_label("n")}}} AS node,
+               p {{.id, .name, .time_range, .dynastic_info}} AS period,
+               relationships,
+               COLLECT {{
+                   MATCH (n)-[:CREATED]->(w:Work)
+                   WITH w, COUNT {{ (:Literature)-[:RECORDS]->(w) }} AS records
+                   ORDER BY records DESC, w.id
+                   LIMIT $top_works
+                   RETURN w {{.id, .title, .status, .support, .period_ref, records: records}}
+               }} AS works,
+               COLLECT {{
+                   MATCH (l:Literature)-[:CRITIQUES|RECORDS]->(n)
+                   WITH l, [i IN range(0, size($quality_ranks) - 1) WHERE $quality_ranks[i] = l.quality_rank][0] AS rank
+                   ORDER BY coalesce(rank, size($quality_ranks)), l.id
+                   LIMIT $top_literature
+                   RETURN l {{
+                       .id, .quote, .quality_rank, .source_book,
+                       author: [(a:Person)-[:WROTE]->(l) | a {{.id, .name}}][0]
+                   }}
+               }} AS literature
+        """
+        records = await self._read(query, {
+            "id": node_id,
+            "per_type": per_type,
+            "top_works": top_works,
+            "top_literature": top_literature,
+            "quality_ranks": list(QUALITY_RANKS),
+        })
+        if not records:
+            return None
+
+        record = records[0]
+        return {
+            "node": record["node"],
+            "period": record["period"],
+            "relationships": record["relationships"],
+            "works": record["works"],
+            "literature": record["literature"],
+        }
+
+    async def get_nodes_details(self, node_ids: list[str]) -> dict[str, dict]:
+        """Get detailed information about several nodes, keyed by id."""
         query = """
-        MATCH (n {id: $id})-[r]->(m)
-        RETURN m.id AS target_id,
+        UNWIND $ids AS id
+        MATCH (n:Entity {id: id})
+        RETURN id, n
+        """
+        records = await self._read(query, {"ids": node_ids})
+        return {record["id"]: dict(record["n"]) for record in records}
+
+    async def get_nodes_relationships(self, node_ids: list[str], limit: int = 100) -> dict[str, dict]:
+        """
+        Get the first page of relationships of several nodes, keyed by id.
+
+        Each page matches ``get_node_relationships`` in both directions, so
+        its ``next_cursor`` can be followed with that method.
+        """
+        query = f"""
+        UNWIND $ids AS id
+        MATCH (n:Entity {{id: id}})
+        CALL {{
+            WITH n
+            MATCH (n)-[r:!LINEAGE]-(m)
+            RETURN r, m
+            ORDER BY type(r), elementId(r)
+            LIMIT $limit
+        }}
+        RETURN id AS source_id,
+               elementId(r) AS relationship_id,
+               CASE WHEN startNode(r) = n THEN 'out' ELSE 'in' END AS direction,
+               m.id AS target_id,
                m.id AS target_name,
-               labels(m)[0] AS target_label,
+               {_primary_label("m")} AS target_label,
                type(r) AS relationship_type,
                r.description AS description
+        ORDER BY source_id, relationship_type, relationship_id
         """
-        result = await self.session.run(query, {"id": node_id})
-        return await result.data()
+        records = await self._read(query, {"ids": node_ids, "limit": limit + 1})
+        rows = {node_id: [] for node_id in node_ids}
+        for record in records:
+            row = record.data()
+            rows[row.pop("source_id")].append(row)
+
+        pages = {}
+        for node_id, relationships in rows.items():
+            next_cursor = None
+            if len(relationships) > limit:
+                relationships = relationships[:limit]
+                last = relationships[-1]
+                next_cursor = encode_cursor(last["relationship_type"], last["relationship_id"])
+            pages[node_id] = {"relationships": relationships, "next_cursor": next_cursor}
+        return pages
 
     async def delete_all(self) -> int:
         """Delete all nodes and relationships."""
-        result = await self.session.run("""
+        records = await self._write("""
         MATCH (n)
         DETACH DELETE n
         RETURN count(n) AS deleted
         """)
-        record = await result.single()
+        record = records[0] if records else None
         return record["deleted"] if record else 0
@@ -1,17 +1,22 @@
 """FastAPI main application for KGCFP."""
 import os
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 from app.api import routes
-from app.graph.connection import init_driver, close_driver
+from app.graph.cache import etag_headers
+from app.graph.connection import init_driver, close_driver, get_pool_stats
+from app.graph.profiling import profile_requested, profile_token_valid
+from app.metrics import REQUEST_SECONDS, REQUESTS_IN_FLIGHT, RESPONSE_BYTES, render_metrics
 
 
 @asynccontextmanager
@@ -40,8 +45,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _route_template(request: Request) -> str:
+    """Path template of the matched route, so metrics are not labelled per id."""
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Older FastAPI versions report included routes with their router prefix
+    # (/api/stats), newer ones without it (/stats); restore any missing
+    # prefix from the request path so labels do not depend on the version.
+    template = route.path.strip("/").split("/")
+    segments = request.url.path.strip("/").split("/")
+    prefix = segments[:max(len(segments) - len(template), 0)]
+    return "/" + "/".join(prefix + template)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency, response size and in-flight count for every request."""
+    REQUESTS_IN_FLIGHT.inc(request.method)
+    started = time.perf_counter()
+    status = "500"
+    response = None
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec(request.method)
+        path = _route_template(request)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, path, status)
+        length = response.headers.get("content-length") if response is not None else None
+        if length is not None:
+            RESPONSE_BYTES.observe(int(length), request.method, path, status)
+
+
+@app.middleware("http")
+async def profile_from_header(request: Request, call_next):
+    """
+    Run the request's Cypher queries under PROFILE when X-Profile-Queries is set.
+
+    The header is only honoured together with a valid X-Profile-Token.
+    """
+    if (
+        request.headers.get("x-profile-queries", "").lower() not in ("1", "true", "yes")
+        or not profile_token_valid(request.headers.get("x-profile-token"))
+    ):
+        return await call_next(request)
+    token = profile_requested.set(True)
+    try:
+        return await call_next(request)
+    finally:
+        profile_requested.reset(token)
+
+
+@app.middleware("http")
+async def add_etag(request: Request, call_next):
+    """Send the graph version ETag set by check_not_modified with successful reads."""
+    response = await call_next(request)
+    etag = getattr(request.state, "etag", None)
+    if etag is not None and response.status_code == 200:
+        response.headers.update(etag_headers(etag))
+    return response
+
+
 # Include routers
-app.include_router(routes.router, prefix="/api", tags=["graph"])
+app.include_router(
+    routes.router,
+    prefix="/api",
+    tags=["graph"],
+    dependencies=[Depends(routes.check_not_modified)],
+)
 
 
 @app.get("/")
@@ -54,3 +127,15 @@ async def root():
 async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/pool")
+async def pool_health():
+    """Neo4j connection pool statistics."""
+    return get_pool_stats()
@@ -0,0 +1,207 @@
+"""Prometheus-style metrics for KGCFP."""
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from app.graph.connection import get_pool_stats
+
+
+# Default latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Default payload size buckets in bytes
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+# Name of the GraphQueries method currently running, used to label Cypher timings
+current_query: ContextVar[Optional[str]] = ContextVar("current_query", default=None)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative histogram with a fixed set of label names."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        """Record one observation for the given label values."""
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, (counts, total, count) in self._series.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labelnames, labelvalues, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge with a fixed set of label names."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues) -> None:
+        self._values[labelvalues] = value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labelvalues, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "kgcfp_http_request_duration_seconds",
+    "HTTP request latency until the response headers are ready.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "kgcfp_http_response_size_bytes",
+    "HTTP response body size, for responses with a known length.",
+    ("method", "route", "status"),
+    SIZE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "kgcfp_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    ("method",),
+)
+QUERY_SECONDS = Histogram(
+    "kgcfp_graph_query_duration_seconds",
+    "Total time spent in a GraphQueries method, including Python post-processing.",
+    ("method",),
+    LATENCY_BUCKETS,
+)
+CYPHER_EXECUTION_SECONDS = Histogram(
+    "kgcfp_cypher_execution_seconds",
+    "Time until Neo4j returned the first response to a Cypher query.",
+    ("method",),
+    LATENCY_BUCKETS,
+)
+CYPHER_CONSUMPTION_SECONDS = Histogram(
+    "kgcfp_cypher_consumption_seconds",
+    "Time spent pulling the records of a Cypher query.",
+    ("method",),
+    LATENCY_BUCKETS,
+)
+POOL_CONNECTIONS = Gauge(
+    "kgcfp_neo4j_pool_connections",
+    "Neo4j driver pool connections by state.",
+    ("state",),
+)
+
+REGISTRY = (
+    REQUEST_SECONDS,
+    RESPONSE_BYTES,
+    REQUESTS_IN_FLIGHT,
+    QUERY_SECONDS,
+    CYPHER_EXECUTION_SECONDS,
+    CYPHER_CONSUMPTION_SECONDS,
+    POOL_CONNECTIONS,
+)
+
+
+def render_metrics() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    pool = get_pool_stats()
+    for state in ("in_use", "idle", "waiting"):
+        POOL_CONNECTIONS.set(pool[state], state)
+
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def instrument_queries(cls):
+    """
+    Class decorator timing every public async method of a query class.
+
+    Methods also expose their name through ``current_query`` so that Cypher
+    execution and consumption times can be attributed to them.
+    """
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if inspect.iscoroutinefunction(func):
+            setattr(cls, name, _instrument_coroutine(name, func))
+        elif inspect.isasyncgenfunction(func):
+            setattr(cls, name, _instrument_generator(name, func))
+    return cls
+
+
+def _instrument_coroutine(name: str, func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_query.set(name)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            QUERY_SECONDS.observe(time.perf_counter() - started, name)
+            current_query.reset(token)
+    return wrapper
+
+
+def _instrument_generator(name: str, func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        # The generator resumes in the consumer's context, so the query name
+        # is set around each step rather than once for the whole stream
+        started = time.perf_counter()
+        items = func(*args, **kwargs)
+        try:
+            while True:
+                token = current_query.set(name)
+                try:
+                    item = await anext(items)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    current_query.reset(token)
+                yield item
+        finally:
+            await items.aclose()
+            QUERY_SECONDS.observe(time.perf_counter() - started, name)
+    return wrapper
@@ -2,6 +2,7 @@
 import json
 import os
 import sys
+import uuid
 from pathlib import Path
 from typing import Any
 
@@ -16,6 +17,19 @@ load_dotenv(project_root / ".env")
 
 from neo4j import GraphDatabase
 
+from app.graph.cache import bump_graph_version
+from app.graph.layout import compute_layout
+from app.graph.lineage import (
+    DELETE_STALE_LINEAGE_QUERY,
+    LINEAGE_TYPE,
+    MERGE_LINEAGE_QUERY,
+    TEACHING_TYPES,
+    compute_closure,
+)
+from app.graph.dates import person_years, range_years
+from app.graph.names import display_names
+from app.graph.queries import NAME_INDEX, NODE_LABELS, TIMELINE_LABELS
+
 
 def serialize_prop(value: Any) -> str:
     """Serialize a property value to JSON string if it's a dict/list."""
@@ -26,6 +40,14 @@ def serialize_prop(value: Any) -> str:
     return value
 
 
+def replace_lineage(tx, rows: list[dict], batch_size: int = 10000):
+    """Transaction function replacing every lineage relationship with closure rows."""
+    build = uuid.uuid4().hex
+    for start in range(0, len(rows), batch_size):
+        tx.run(MERGE_LINEAGE_QUERY, rows=rows[start:start + batch_size], build=build).consume()
+    tx.run(DELETE_STALE_LINEAGE_QUERY, build=build).consume()
+
+
 class Neo4jImporter:
     """Import extracted data into Neo4j."""
 
@@ -40,9 +62,10 @@ class Neo4jImporter:
         with self.driver.session() as session:
             session.run("MATCH (n) DETACH DELETE n")
             print("Database cleared.")
+        bump_graph_version()
 
     def create_constraints(self):
-        """Create constraints for better performance."""
+        """Create constraints and indexes for better performance."""
         with self.driver.session() as session:
             constraints = [
                 "CREATE CONSTRAINT period_id_unique IF NOT EXISTS FOR (p:Period) REQUIRE p.id IS UNIQUE",
@@ -51,6 +74,40 @@ class Neo4jImporter:
                 "CREATE CONSTRAINT person_id_unique IF NOT EXISTS FOR (p:Person) REQUIRE p.id IS UNIQUE",
                 "CREATE CONSTRAINT work_id_unique IF NOT EXISTS FOR (w:Work) REQUIRE w.id IS UNIQUE",
                 "CREATE CONSTRAINT literature_id_unique IF NOT EXISTS FOR (l:Literature) REQUIRE l.id IS UNIQUE",
+                # Shared label on every entity so id lookups without a known label can seek
+                "CREATE INDEX entity_id IF NOT EXISTS FOR (n:Entity) ON (n.id)",
+                "CREATE INDEX person_period_ref IF NOT EXISTS FOR (p:Person) ON (p.period_ref)",
+                "CREATE INDEX work_period_ref IF NOT EXISTS FOR (w:Work) ON (w.period_ref)",
+                "CREATE INDEX entity_display_name IF NOT EXISTS FOR (n:Entity) ON (n.display_name)",
+                # Facet filters of /api/graph and /api/search
+                "CREATE INDEX person_primary_role IF NOT EXISTS FOR (p:Person) ON (p.primary_role)",
+                "CREATE INDEX work_status IF NOT EXISTS FOR (w:Work) ON (w.status)",
+                "CREATE INDEX work_support IF NOT EXISTS FOR (w:Work) ON (w.support)",
+                *(
+                    f"CREATE INDEX {label.lower()}_source_book IF NOT EXISTS FOR (n:{label}) ON (n.source_book)"
+                    for label in NODE_LABELS
+                ),
+                # Numeric year ranges for /api/timeline
+                "CREATE INDEX person_birth_year IF NOT EXISTS FOR (p:Person) ON (p.birth_year)",
+                "CREATE INDEX person_death_year IF NOT EXISTS FOR (p:Person) ON (p.death_year)",
+                *(
+                    f"CREATE INDEX {label.lower()}_{prop} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+                    for label in TIMELINE_LABELS
+                    for prop in ("start_year", "end_year")
+                ),
+                "CREATE INDEX worked_at_start_year IF NOT EXISTS FOR ()-[r:WORKED_AT]-() ON (r.start_year)",
+                f"CREATE INDEX lineage_depth IF NOT EXISTS FOR ()-[l:{LINEAGE_TYPE}]-() ON (l.depth)",
+                # Full-text name search; the CJK analyzer tokenizes Chinese into bigrams.
+                # The index name is versioned so that a changed property list gets a
+                # new index instead of dropping the one search is using on every run.
+                f"""CREATE FULLTEXT INDEX {NAME_INDEX} IF NOT EXISTS
+                   FOR (n:{"|".join(NODE_LABELS)})
+                   ON EACH [n.display_name, n.name_zh, n.name_en, n.courtesy_name, n.pseudonym,
+                            n.other_names, n.historical_names]
+                   OPTIONS {{indexConfig: {{`fulltext.analyzer`: 'cjk'}}}}""",
+                # Earlier versions of the name index
+                "DROP INDEX entity_name_fulltext IF EXISTS",
+                "DROP INDEX entity_name_fulltext_v2 IF EXISTS",
             ]
             for constraint in constraints:
                 try:
@@ -58,17 +115,45 @@ class Neo4jImporter:
                 except Exception as e:
                     print(f"Constraint: {e}")
 
+    def label_entities(self):
+        """Add the shared :Entity label to nodes imported before it existed."""
+        with self.driver.session() as session:
+            session.run("""
+                MATCH (n) WHERE n.id IS NOT NULL AND NOT n:Entity
+                CALL { WITH n SET n:Entity } IN TRANSACTIONS OF 10000 ROWS
+            """)
+
+    def backfill_display_names(self):
+        """Add display names to persons, periods and works imported before they existed."""
+        with self.driver.session() as session:
+            session.run("""
+                MATCH (n:Person|Period|Work) WHERE n.display_name IS NULL
+                CALL {
+                    WITH n
+                    SET n.display_name = coalesce(n.name, n.title, n.id),
+                        n.name_zh = coalesce(n.name_zh, n.name, n.title)
+                } IN TRANSACTIONS OF 10000 ROWS
+            """)
+
     def import_periods(self, periods: list[dict]):
         """Import Period nodes."""
         with self.driver.session() as session:
             for period in periods:
                 session.run("""
                     MERGE (p:Period {id: $id})
-                    SET p.name = $name,
+                    SET p:Entity,
+                        p.name = $name,
                         p.time_range = $time_range,
+                        p.start_year = $start_year,
+                        p.end_year = $end_year,
                         p.dynastic_info = $dynastic_info,
-                        p.source_book = $source_book
-                """, id=period.get("id"),
+                        p.source_book = $source_book,
+                        p.display_name = $display_name,
+                        p.name_zh = $name_zh,
+                        p.name_en = $name_en
+                """, **display_names("Period", period),
+                   **range_years(period.get("time_range")),
+                   id=period.get("id"),
                    name=period.get("name"),
                    time_range=serialize_prop(period.get("time_range")),
                    dynastic_info=period.get("dynastic_info"),
@@ -81,11 +166,16 @@ class Neo4jImporter:
             for loc in locations:
                 session.run("""
                     MERGE (l:Location {id: $id})
-                    SET l.historical_names = $historical_names,
+                    SET l:Entity,
+                        l.historical_names = $historical_names,
                         l.modern_address = $modern_address,
                         l.coordinates = $coordinates,
-                        l.source_book = $source_book
-                """, id=loc.get("id"),
+                        l.source_book = $source_book,
+                        l.display_name = $display_name,
+                        l.name_zh = $name_zh,
+                        l.name_en = $name_en
+                """, **display_names("Location", loc),
+                   id=loc.get("id"),
                    historical_names=serialize_prop(loc.get("historical_names")),
                    modern_address=loc.get("modern_address"),
                    coordinates=serialize_prop(loc.get("coordinates")),
@@ -98,11 +188,16 @@ class Neo4jImporter:
             for icon in iconographies:
                 session.run("""
                     MERGE (i:Iconography {id: $id})
-                    SET i.name = $name,
+                    SET i:Entity,
+                        i.name = $name,
                         i.parent_id = $parent_id,
                         i.visual_elements = $visual_elements,
-                        i.source_book = $source_book
-                """, id=icon.get("id"),
+                        i.source_book = $source_book,
+                        i.display_name = $display_name,
+                        i.name_zh = $name_zh,
+                        i.name_en = $name_en
+                """, **display_names("Iconography", icon),
+                   id=icon.get("id"),
                    name=serialize_prop(icon.get("name")),
                    parent_id=icon.get("parent_id"),
                    visual_elements=serialize_prop(icon.get("visual_elements")),
@@ -111,22 +206,36 @@ class Neo4jImporter:
 
     def import_persons(self, persons: list[dict]):
         """Import Person nodes."""
+        # Periods are imported first, so a missing birth or death year can
+        # fall back to the bound of the person's period
         with self.driver.session() as session:
             for person in persons:
                 session.run("""
                     MERGE (p:Person {id: $id})
-                    SET p.primary_role = $primary_role,
+                    SET p:Entity,
+                        p.primary_role = $primary_role,
                         p.name = $name,
                         p.courtesy_name = $courtesy_name,
                         p.pseudonym = $pseudonym,
                         p.other_names = $other_names,
                         p.choronym = $choronym,
                         p.birth_death = $birth_death,
+                        p.birth_year = $birth_year,
+                        p.death_year = $death_year,
                         p.period_ref = $period_ref,
                         p.authority_ids = $authority_ids,
                         p.biography = $biography,
-                        p.source_book = $source_book
-                """, id=person.get("id"),
+                        p.source_book = $source_book,
+                        p.display_name = $display_name,
+                        p.name_zh = $name_zh,
+                        p.name_en = $name_en
+                    WITH p
+                    OPTIONAL MATCH (period:Period {id: p.period_ref})
+                    SET p.start_year = coalesce(p.birth_year, period.start_year, p.death_year),
+                        p.end_year = coalesce(p.death_year, period.end_year, p.birth_year)
+                """, **display_names("Person", person),
+                   **person_years(person.get("birth_death")),
+                   id=person.get("id"),
                    primary_role=person.get("primary_role"),
                    name=person.get("name"),
                    courtesy_name=person.get("courtesy_name"),
@@ -146,7 +255,8 @@ class Neo4jImporter:
             for work in works:
                 session.run("""
                     MERGE (w:Work {id: $id})
-                    SET w.title = $title,
+                    SET w:Entity,
+                        w.title = $title,
                         w.creator_ref = $creator_ref,
                         w.period_ref = $period_ref,
                         w.icon_ref = $icon_ref,
@@ -155,8 +265,12 @@ class Neo4jImporter:
                         w.dimensions = $dimensions,
                         w.repository = $repository,
                         w.description = $description,
-                        w.source_book = $source_book
-                """, id=work.get("id"),
+                        w.source_book = $source_book,
+                        w.display_name = $display_name,
+                        w.name_zh = $name_zh,
+                        w.name_en = $name_en
+                """, **display_names("Work", work),
+                   id=work.get("id"),
                    title=work.get("title"),
                    creator_ref=work.get("creator_ref"),
                    period_ref=work.get("period_ref"),
@@ -175,13 +289,18 @@ class Neo4jImporter:
             for lit in literature:
                 session.run("""
                     MERGE (l:Literature {id: $id})
-                    SET l.target_ref = $target_ref,
+                    SET l:Entity,
+                        l.target_ref = $target_ref,
                         l.source_book = $source_book,
                         l.author_ref = $author_ref,
                         l.quality_rank = $quality_rank,
                         l.quote = $quote,
-                        l.source_book_ref = $source_book_ref
-                """, id=lit.get("id"),
+                        l.source_book_ref = $source_book_ref,
+                        l.display_name = $display_name,
+                        l.name_zh = $name_zh,
+                        l.name_en = $name_en
+                """, **display_names("Literature", lit),
+                   id=lit.get("id"),
                    target_ref=lit.get("target_ref"),
                    source_book=lit.get("source_book"),
                    author_ref=lit.get("author_ref"),
@@ -202,8 +321,11 @@ class Neo4jImporter:
                         SET r.official_title = $official_title,
                             r.rank = $rank,
                             r.tenure = $tenure,
+                            r.start_year = $start_year,
+                            r.end_year = $end_year,
                             r.event_type = $event_type
-                    """, person_ref=cv.get("person_ref"),
+                    """, **range_years(cv.get("tenure")),
+                       person_ref=cv.get("person_ref"),
                        location_ref=cv.get("location_ref"),
                        official_title=cv.get("official_title"),
                        rank=cv.get("rank"),
@@ -251,6 +373,8 @@ class Neo4jImporter:
                         MATCH (w:Work {id: $work_id})
                         MATCH (p:Period {id: $period_ref})
                         MERGE (w)-[r:DATED_TO]->(p)
+                        SET w.start_year = p.start_year,
+                            w.end_year = p.end_year
                     """, work_id=work.get("id"), period_ref=work.get("period_ref"))
 
                 if work.get("icon_ref"):
@@ -310,12 +434,57 @@ class Neo4jImporter:
         self.import_work_relationships(data.get("works", []))
         self.import_literature_relationships(data.get("literature", []))
 
+    def update_layout(self):
+        """Compute layout positions for nodes that do not have one yet."""
+        with self.driver.session() as session:
+            nodes = session.run("""
+                MATCH (n:Entity)
+                RETURN n.id AS id, n.layout_x AS x, n.layout_y AS y
+            """).data()
+            edges = session.run("""
+                MATCH (a:Entity)-[:!LINEAGE]->(b:Entity)
+                RETURN a.id AS source, b.id AS target
+            """).data()
+
+            positions = {n["id"]: (n["x"], n["y"]) for n in nodes if n["x"] is not None}
+            moved = compute_layout(
+                [n["id"] for n in nodes],
+                [(e["source"], e["target"]) for e in edges],
+                positions,
+            )
+            session.run("""
+                UNWIND $rows AS row
+                MATCH (n:Entity {id: row.id})
+                SET n.layout_x = row.x, n.layout_y = row.y
+            """, rows=[{"id": node_id, "x": x, "y": y} for node_id, (x, y) in moved.items()])
+        print(f"Laid out {len(moved)} nodes")
+
+    def update_lineage(self):
+        """Rebuild the master-student lineage closure from the teaching edges."""
+        with self.driver.session() as session:
+            edges = session.run("""
+                MATCH (a:Entity)-[r]->(b:Entity)
+                WHERE type(r) IN $types
+                RETURN a.id AS master, b.id AS student
+            """, types=list(TEACHING_TYPES)).data()
+
+            rows = [
+                {"ancestor": ancestor, "descendant": descendant, "depth": depth}
+                for ancestor, descendant, depth in compute_closure(
+                    [(e["master"], e["student"]) for e in edges]
+                )
+            ]
+            # One transaction, so the API keeps serving the previous lineage
+            # and concurrent rebuilds cannot interleave
+            session.execute_write(replace_lineage, rows)
+        print(f"Built {len(rows)} lineage relationships")
+
     def get_stats(self):
         """Get database statistics."""
         with self.driver.session() as session:
             result = session.run("""
                 MATCH (n)
-                RETURN labels(n)[0] AS label, count(*) AS count
+                RETURN [l IN labels(n) WHERE l <> 'Entity'][0] AS label, count(*) AS count
                 ORDER BY count DESC
             """)
             print("\n=== Database Statistics ===")
@@ -323,7 +492,7 @@ class Neo4jImporter:
                 print(f"  {record['label']}: {record['count']}")
 
             result = session.run("""
-                MATCH ()-[r]->()
+                MATCH ()-[r:!LINEAGE]->()
                 RETURN type(r) AS type, count(*) AS count
                 ORDER BY count DESC
             """)
@@ -360,11 +529,20 @@ def main():
 
     print("\nCreating constraints...")
     importer.create_constraints()
+    importer.label_entities()
+    importer.backfill_display_names()
 
     for json_file in json_files:
         print(f"\nImporting: {json_file.name}")
         importer.import_file(str(json_file))
 
+    print("\nComputing layout...")
+    importer.update_layout()
+    importer.update_lineage()
+
+    # Invalidate caches held by running API workers
+    bump_graph_version()
+
     importer.get_stats()
     importer.close()
     print("\nImport complete!")
@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef, useCallback } from 'react'
 import { Network } from 'vis-network'
 import { DataSet } from 'vis-data'
-import axios from 'axios'
+import axios, { type AxiosResponse } from 'axios'
 
 interface GraphNode {
   id: string
@@ -9,6 +9,8 @@ interface GraphNode {
   name: string
   dynasty?: string
   role?: string
+  x?: number | null
+  y?: number | null
 }
 
 interface GraphEdge {
@@ -17,6 +19,12 @@ interface GraphEdge {
   type: string
 }
 
+interface GraphPage {
+  nodes: GraphNode[]
+  edges: GraphEdge[]
+  next_cursor: string | null
+}
+
 const API_BASE = '/api'
 
 function App() {
@@ -35,9 +43,19 @@ function App() {
     const fetchGraph = async () => {
       try {
         setLoading(true)
-        const response = await axios.get(`${API_BASE}/graph`)
-        setNodes(response.data.nodes)
-        setEdges(response.data.edges)
+        const allNodes: GraphNode[] = []
+        const allEdges: GraphEdge[] = []
+        let cursor: string | null = null
+        do {
+          const response: AxiosResponse<GraphPage> = await axios.get<GraphPage>(`${API_BASE}/graph`, {
+            params: { limit: 500, cursor: cursor ?? undefined },
+          })
+          allNodes.push(...response.data.nodes)
+          allEdges.push(...response.data.edges)
+          cursor = response.data.next_cursor
+        } while (cursor)
+        setNodes(allNodes)
+        setEdges(allEdges)
         setError(null)
       } catch (err) {
         setError('Failed to load graph data. Make sure the backend is running.')
@@ -60,9 +78,14 @@ function App() {
         label: n.name,
         group: n.label,
         title: `${n.name}\n${n.label}${n.dynasty ? ` - ${n.dynasty}` : ''}`,
+        x: n.x ?? undefined,
+        y: n.y ?? undefined,
       }))
     )
 
+    // Skip client-side physics when the backend supplied a layout
+    const hasLayout = nodes.every((n) => n.x != null && n.y != null)
+
     const edgeDataSet = new DataSet(
       edges.map((e, i) => ({
         id: i,
@@ -99,6 +122,7 @@ function App() {
         },
       },
       physics: {
+        enabled: !hasLayout,
         stabilization: false,
         barnesHut: {
           gravitationalConstant: -2000,